@@ -0,0 +1,266 @@
+# benchmark.py
+# Latency / throughput / memory benchmark of model_service/app.py → JSON to diff between commits.
+#
+#   python benchmark.py                       # full sweep → benchmark_results.json
+#   BENCH_MODES=inprocess BENCH_CONCURRENCY=1,8 python benchmark.py
+#
+# Every configuration runs in a fresh process (the service reads its settings
+# from env at startup): "inprocess" drives the ASGI app directly through httpx,
+# "http" drives a local uvicorn. Needs httpx (already used by FastAPI's TestClient).
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+# same default as model_service/runtime.py; handed to every worker resolved
+MODEL_PATH = Path(os.getenv("MODEL_PATH", str(ROOT / "modelsequence"))).resolve()
+
+# 🔹 Sweep (comma-separated env overrides)
+MODES = os.getenv("BENCH_MODES", "inprocess,http").split(",")
+CONCURRENCY = [int(c) for c in os.getenv("BENCH_CONCURRENCY", "1,4,16").split(",")]
+BATCH_SIZES = [int(b) for b in os.getenv("BENCH_BATCH_SIZES", "1,8,16").split(",")]
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "300"))
+WARMUP_REQUESTS = int(os.getenv("BENCH_WARMUP", "20"))
+SEED = int(os.getenv("BENCH_SEED", "0"))
+OUT = os.getenv("BENCH_OUT", str(ROOT / "benchmark_results.json"))
+
+# cache off by default → every request measures the model, not a dict lookup
+CACHE_SIZE = os.getenv("BENCH_CACHE_SIZE", "0")
+
+# GoEmotions comments: median ≈ 12 words, long right tail
+LENGTH_MEDIAN_WORDS = 12
+LENGTH_SIGMA = 0.6
+MAX_WORDS = 60
+
+SERVER_START_TIMEOUT_S = 180
+
+
+def backends():
+    """(name, env) for every backend this checkout can serve."""
+    found = [("torch-fp32", {"MODEL_BACKEND": "torch", "MODEL_PRECISION": "fp32"})]
+
+    from moodify_core.quantization import INT8_FILENAME
+    from moodify_core.backends import ONNX_FILENAME
+
+    if (MODEL_PATH / INT8_FILENAME).exists():
+        found.append(("torch-int8", {"MODEL_BACKEND": "torch", "MODEL_PRECISION": "int8"}))
+    if (MODEL_PATH / ONNX_FILENAME).exists():
+        found.append(("onnx-fp32", {"MODEL_BACKEND": "onnx", "MODEL_PRECISION": "fp32"}))
+    return found
+
+
+def make_texts(n, seed=SEED):
+    """`n` texts with GoEmotions-like word counts, stitched from test_inference.tests."""
+    from test_inference import tests
+
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        target = min(MAX_WORDS, max(1, round(rng.lognormvariate(np.log(LENGTH_MEDIAN_WORDS), LENGTH_SIGMA))))
+        words = []
+        while len(words) < target:
+            words += rng.choice(tests).split()
+        texts.append(" ".join(words[:target]))
+    return texts
+
+
+async def drive(client, texts, concurrency):
+    """POST every text to /predict with `concurrency` requests in flight."""
+    for text in texts[:WARMUP_REQUESTS]:
+        await client.post("/predict", json={"text": text})
+
+    pending = iter(texts[WARMUP_REQUESTS:])
+    latencies, errors = [], {}
+
+    async def worker():
+        for text in pending:
+            start = time.perf_counter()
+            r = await client.post("/predict", json={"text": text})
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[r.status_code] = errors.get(r.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000.0
+    pct = lambda q: round(float(np.percentile(lat_ms, q)), 3) if len(lat_ms) else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "mean": round(float(lat_ms.mean()), 3) if len(lat_ms) else None},
+    }
+
+
+async def served_as(client):
+    startup = (await client.get("/metrics")).json()["startup"]
+    # what actually loaded (the service falls back to torch fp32 on problems)
+    return {"served_backend": startup["backend"], "served_precision": startup["precision"]}
+
+
+def run_inprocess(config):
+    """Child process: drive the ASGI app directly (no network, no uvicorn)."""
+    import httpx
+
+    from model_service import app
+
+    app.get_runtime()   # load outside the timed section
+
+    async def main():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            stats = await drive(client, make_texts(WARMUP_REQUESTS + REQUESTS), config["concurrency"])
+            stats.update(await served_as(client))
+            return stats
+
+    stats = asyncio.run(main())
+    stats["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return stats
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run_http(config, env):
+    """Parent process: start uvicorn with `env`, drive it over localhost."""
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "model_service.app:app", "--app-dir", str(ROOT),
+         "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    async def main():
+        base_url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=config["concurrency"])
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT_S
+            while True:
+                try:
+                    if (await client.get("/metrics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not come up")
+                await asyncio.sleep(0.5)
+
+            stats = await drive(client, make_texts(WARMUP_REQUESTS + REQUESTS), config["concurrency"])
+            stats.update(await served_as(client))
+            return stats
+
+    try:
+        stats = asyncio.run(main())
+        stats["peak_rss_mb"] = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return stats
+
+
+def run_config(config, backend_env):
+    env = dict(os.environ)
+    env.update(backend_env)
+    env.update({
+        "BATCH_MAX_SIZE": str(config["batch_size"]),
+        "PREDICTION_CACHE_SIZE": CACHE_SIZE,
+        "MODEL_PATH": str(MODEL_PATH),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")])),
+    })
+
+    if config["mode"] == "http":
+        return run_http(config, env)
+
+    # fresh interpreter per config → clean peak RSS, settings read at startup
+    proc = subprocess.run(
+        [sys.executable, __file__, "--inprocess", json.dumps(config)],
+        env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "benchmark worker failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    import torch
+
+    texts = make_texts(WARMUP_REQUESTS + REQUESTS)
+    words = np.array([len(t.split()) for t in texts])
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "model_path": str(MODEL_PATH),
+        "requests_per_run": REQUESTS,
+        "warmup_requests": WARMUP_REQUESTS,
+        "cache_size": int(CACHE_SIZE),
+        "text_words": {"p50": float(np.percentile(words, 50)), "p95": float(np.percentile(words, 95)), "max": int(words.max())},
+        "results": [],
+    }
+
+    for backend_name, backend_env in backends():
+        for mode in MODES:
+            for batch_size in BATCH_SIZES:
+                for concurrency in CONCURRENCY:
+                    config = {"mode": mode, "backend": backend_name, "batch_size": batch_size, "concurrency": concurrency}
+                    print(f"⏱️ {config}")
+                    try:
+                        config.update(run_config(config, backend_env))
+                        print(f"   p50={config['latency_ms']['p50']}ms p99={config['latency_ms']['p99']}ms rps={config['rps']} peak={config['peak_rss_mb']}MB")
+                    except Exception as e:
+                        config["error"] = str(e)
+                        print(f"   ❌ {e}")
+                    report["results"].append(config)
+
+    with open(OUT, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Saved {OUT}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--inprocess":
+        print(json.dumps(run_inprocess(json.loads(sys.argv[2]))))
+    else:
+        main()
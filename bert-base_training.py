@@ -1,14 +1,18 @@
-from datasets import load_dataset
 from transformers import (
-    BertTokenizer,
     BertForSequenceClassification,
     TrainingArguments,
-    Trainer
+    Trainer,
+    DataCollatorWithPadding
 )
+import os
 import numpy as np
 import torch
 from sklearn.metrics import f1_score
 
+from moodify_core.goemotions import load_split
+from moodify_core.tokenization import load_tokenizer
+from moodify_core.training import ThroughputCallback, cpu_supports_bf16
+
 # -------------------------------
 # PyTorch 2.6 pickle fix
 # -------------------------------
@@ -19,14 +23,7 @@ torch.serialization.add_safe_globals([
 ])
 
 # -------------------------------
-# 1️⃣ Dataset
-# -------------------------------
-dataset = load_dataset("go_emotions")
-train = dataset["train"]
-test = dataset["test"]
-
-# -------------------------------
-# 2️⃣ Tokenizer & Model (BERT-base)
+# 1️⃣ Tokenizer & Model (BERT-base)
 # -------------------------------
 num_labels = 28
 checkpoint_path = "./results_bert/checkpoint-last"  # varsa resume
@@ -46,37 +43,16 @@ except:
     )
     print("⚙️ Starting fresh BERT-base training...")
 
-tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
+tokenizer = load_tokenizer("bert-base-uncased")
 
 # -------------------------------
-# 3️⃣ Tokenization
+# 2️⃣ Dataset: prepared token ids, memory-mapped (prepare_data.py)
+#    no padding → padded per batch by the collator
 # -------------------------------
-def tokenize(batch):
-    encodings = tokenizer(
-        batch["text"],
-        truncation=True,
-        padding="max_length",
-        max_length=128
-    )
-
-    labels = []
-    for labs in batch["labels"]:
-        row = [0.0] * num_labels
-        for i in labs:
-            row[i] = 1.0
-        labels.append(row)
-
-    encodings["labels"] = labels
-    return encodings
-
-train = train.map(tokenize, batched=True)
-test = test.map(tokenize, batched=True)
-
-train.set_format(type="torch", columns=["input_ids", "attention_mask", "labels"])
-test.set_format(type="torch", columns=["input_ids", "attention_mask", "labels"])
-
+train = load_split("train", tokenizer, max_length=128).torch_dataset()
+test = load_split("test", tokenizer, max_length=128).torch_dataset()
 # -------------------------------
-# 4️⃣ Metrics
+# 3️⃣ Metrics
 # -------------------------------
 def compute_metrics(eval_pred):
     logits, labels = eval_pred
@@ -95,37 +71,66 @@ def compute_metrics(eval_pred):
     }
 
 # -------------------------------
-# 5️⃣ Trainer Override (float labels)
+# 4️⃣ Trainer Override (float labels)
 # -------------------------------
+throughput = ThroughputCallback()   # samples/s + tokens/s at every logging step
+
+
 class FloatTrainer(Trainer):
     def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
         if "labels" in inputs:
             inputs["labels"] = inputs["labels"].to(torch.float32)
+        if model.training:
+            throughput.observe(inputs)
 
         outputs = model(**inputs)
         loss = outputs.loss
         return (loss, outputs) if return_outputs else loss
 
 # -------------------------------
-# 6️⃣ Training Arguments (BERT için ayarlı)
+# 5️⃣ Training Arguments (BERT için ayarlı)
 # -------------------------------
+# 🔹 CPU mode (default without CUDA, or TRAIN_DEVICE=cpu): micro-batches of
+#    TRAIN_BATCH_SIZE, gradient accumulation up to TRAIN_EFFECTIVE_BATCH_SIZE,
+#    bf16 autocast where the CPU has native bf16 (TRAIN_BF16=auto|1|0),
+#    TRAIN_DATALOADER_WORKERS collating in the background
+CPU_MODE = os.getenv("TRAIN_DEVICE", "cuda" if torch.cuda.is_available() else "cpu") == "cpu"
+
+if CPU_MODE:
+    batch_size = int(os.getenv("TRAIN_BATCH_SIZE", "16"))
+    accumulation = max(1, int(os.getenv("TRAIN_EFFECTIVE_BATCH_SIZE", "32")) // batch_size)
+    bf16_setting = os.getenv("TRAIN_BF16", "auto")
+    bf16 = cpu_supports_bf16() if bf16_setting == "auto" else bf16_setting == "1"
+    workers = int(os.getenv("TRAIN_DATALOADER_WORKERS", "2"))
+    print(f"🖥️ CPU training: {batch_size} × {accumulation} accumulation steps, "
+          f"bf16={bf16}, {workers} dataloader workers, {torch.get_num_threads()} threads")
+else:
+    batch_size, accumulation, bf16, workers = 2, 1, False, 0   # 🔴 BERT için KÜÇÜK
+
 training_args = TrainingArguments(
     output_dir="./results_bert",
     eval_strategy="epoch",
     learning_rate=2e-5,
-    per_device_train_batch_size=2,   # 🔴 BERT için KÜÇÜK
-    per_device_eval_batch_size=2,
+    per_device_train_batch_size=batch_size,
+    per_device_eval_batch_size=batch_size * 2 if CPU_MODE else 2,   # eval: no activations kept
+    gradient_accumulation_steps=accumulation,
     num_train_epochs=2,
     weight_decay=0.01,
-    logging_steps=100,
+    logging_steps=10 if CPU_MODE else 100,   # optimizer steps
     save_strategy="epoch",
     save_total_limit=1,
-    fp16=torch.cuda.is_available(),  # varsa hızlandır
+    use_cpu=CPU_MODE,
+    fp16=not CPU_MODE and torch.cuda.is_available(),  # varsa hızlandır
+    bf16=bf16,                       # CPU autocast, fp32 master weights
+    dataloader_num_workers=workers,
+    dataloader_persistent_workers=workers > 0,
+    dataloader_pin_memory=not CPU_MODE,
+    group_by_length=True,            # benzer uzunluklar aynı batch'te → az padding
     report_to="none"
 )
 
 # -------------------------------
-# 7️⃣ Trainer
+# 6️⃣ Trainer
 # -------------------------------
 trainer = FloatTrainer(
     model=model,
@@ -133,16 +138,18 @@ trainer = FloatTrainer(
     train_dataset=train,
     eval_dataset=test,
     tokenizer=tokenizer,
-    compute_metrics=compute_metrics
+    data_collator=DataCollatorWithPadding(tokenizer),
+    compute_metrics=compute_metrics,
+    callbacks=[throughput]
 )
 
 # -------------------------------
-# 8️⃣ Train
+# 7️⃣ Train
 # -------------------------------
 trainer.train(resume_from_checkpoint=checkpoint_path if "checkpoint" in checkpoint_path else None)
 
 # -------------------------------
-# 9️⃣ Save final model
+# 8️⃣ Save final model
 # -------------------------------
 trainer.save_model("./modelsequence")
 tokenizer.save_pretrained("./modelsequence")
@@ -1,121 +1,137 @@
 import json
-import torch
+import os
+import sys
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import matplotlib.pyplot as plt
-from datasets import load_dataset
-from sklearn.metrics import f1_score, accuracy_score, precision_score, recall_score
-from transformers import (
-    DistilBertTokenizer, DistilBertForSequenceClassification,
-    BertTokenizer, BertForSequenceClassification
-)
+from transformers import AutoModelForSequenceClassification
+
+from moodify_core.evaluation import evaluate_probs, run_inference
+from moodify_core.goemotions import load_split
+from moodify_core.logits_cache import load_or_compute
+from moodify_core.postprocess import EmotionPostProcessor
 
 # =========================
 # CONFIG
 # =========================
-DISTIL_MODEL_PATH = "./model"        # DistilBERT
-BERT_MODEL_PATH   = "./modelsequence"   # BERT-base
+# python compare_models_inference.py [model_dir ...]   (default: ./model ./modelsequence)
+DEFAULT_MODEL_PATHS = ["./model", "./modelsequence"]
 THRESHOLD_PATH    = "./model/optimized_thresholds.json"
 
-TOP_K = 3
-MIN_CONFIDENCE = 0.15
-LABELS = [
-    "admiration","amusement","anger","annoyance","approval","caring",
-    "confusion","curiosity","desire","disappointment","disapproval","disgust",
-    "embarrassment","excitement","fear","gratitude","grief","joy",
-    "love","nervousness","optimism","pride","realization","relief",
-    "remorse","sadness","surprise","neutral"
-]
+# display name, single-model figure, color of the known checkpoints
+KNOWN_MODELS = {
+    "model": ("DistilBERT", "DistilBERT (Baseline)", "distilbert_performance.png", "#9D4EDD"),
+    "modelsequence": ("BERT-base", "BERT-base (Final Model)", "bert_performance.png", "#C77DFF"),
+}
+EXTRA_COLORS = ["#5A189A", "#E0AAFF", "#3C096C", "#7B2CBF", "#240046"]
 
-# =========================
-# LOAD DATA
-# =========================
-print("🔍 Loading GoEmotions test set...")
-dataset = load_dataset("go_emotions")
-test = dataset["test"]
+BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "64"))   # texts per forward pass
+
+# 🔹 Models are evaluated in parallel worker processes (COMPARE_WORKERS, default: one
+#    per model up to the core count); each worker gets its own slice of the cores
+#    → wall time ≈ the slowest model instead of the sum
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+WORKERS = int(os.getenv("COMPARE_WORKERS", "0"))
+
+
+def describe(model_path, index):
+    key = Path(model_path).resolve().name
+    if key in KNOWN_MODELS:
+        name, title, filename, color = KNOWN_MODELS[key]
+    else:
+        name, title = key, key
+        filename = f"{key}_performance.png"
+        color = EXTRA_COLORS[index % len(EXTRA_COLORS)]
+    return {"path": model_path, "name": name, "title": title, "filename": filename, "color": color}
 
-with open(THRESHOLD_PATH) as f:
-    THRESHOLDS = json.load(f)
 
 # =========================
 # INFERENCE EVALUATION
 # =========================
-def evaluate_model(model, tokenizer, model_name):
-    print(f"\n🚀 Evaluating {model_name} ...")
+_worker_cores = None
 
-    all_preds, all_labels = [], []
 
-    for sample in test:
-        text = sample["text"]
-        true = sample["labels"]
+def init_worker(next_slot, slots, threads):
+    """Pin this worker to its own `threads` cores (and torch to as many threads)."""
+    global _worker_cores
+    with next_slot.get_lock():
+        slot = next_slot.value
+        next_slot.value += 1
 
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=128
-        )
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        _worker_cores = cores[(slot % slots) * threads:][:threads] or cores[:threads]
+        os.sched_setaffinity(0, _worker_cores)
+
+    import torch
+    torch.set_num_threads(threads)
 
-        with torch.no_grad():
-            logits = model(**inputs).logits
-            probs = torch.sigmoid(logits)[0]
 
-        preds = [0] * 28
-        text_len = len(text.split())
-        length_penalty = 0.05 if text_len < 4 else 0.0
+def evaluate_model(model_path, model_name, threads=0):
+    print(f"\n🚀 Evaluating {model_name} ...")
+    start = time.perf_counter()
+
+    # prepared test split; models whose tokenizers yield the same ids (DistilBERT /
+    # BERT-base uncased) read the same token ids, also across worker processes
+    test = load_split("test")
 
-        scored = []
-        for i, score in enumerate(probs):
-            threshold = THRESHOLDS.get(LABELS[i], 0.3) + length_penalty
-            score_val = score.item()
-            if score_val >= threshold and score_val >= MIN_CONFIDENCE:
-                scored.append((i, score_val))
+    with open(THRESHOLD_PATH) as f:
+        thresholds = json.load(f)
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        scored = scored[:TOP_K]
+    # thresholds + length penalty + MIN_CONFIDENCE + TOP_K, shared with the service
+    postprocessor = EmotionPostProcessor(thresholds)
 
-        for idx, _ in scored:
-            preds[idx] = 1
+    def run_model():
+        print(f"📦 Loading {model_name} from {model_path}...")
+        logits = run_inference(
+            AutoModelForSequenceClassification, model_path, test.texts, max_length=128,
+            batch_size=BATCH_SIZE, threads=threads, split="test"
+        )
+        return logits.numpy(), test.labels
 
-        gt = [0] * 28
-        for l in true:
-            gt[l] = 1
+    # models are only loaded when their logits are not cached on disk yet
+    logits, labels = load_or_compute(model_path, "go_emotions/test", 128, run_model)
 
-        all_preds.append(preds)
-        all_labels.append(gt)
+    # memory-mapped logits scored chunk by chunk (sigmoid per chunk)
+    metrics = evaluate_probs(postprocessor, logits, test.texts, labels, from_logits=True)
 
-    all_preds = np.array(all_preds)
-    all_labels = np.array(all_labels)
+    seconds = time.perf_counter() - start
+    print(f"✅ {model_name} done in {seconds:.1f}s" + (f" (cores {_worker_cores})" if _worker_cores else ""))
 
-    metrics = {
-        "Accuracy": accuracy_score(all_labels, all_preds) * 100,
-        "Precision": precision_score(all_labels, all_preds, average="micro") * 100,
-        "Recall": recall_score(all_labels, all_preds, average="micro") * 100,
-        "F1_micro": f1_score(all_labels, all_preds, average="micro") * 100,
-        "F1_macro": f1_score(all_labels, all_preds, average="macro") * 100,
-        "F1_weighted": f1_score(all_labels, all_preds, average="weighted") * 100,
+    return {
+        "Accuracy": metrics["accuracy"] * 100,
+        "Precision": metrics["precision"] * 100,
+        "Recall": metrics["recall"] * 100,
+        "F1_micro": metrics["f1_micro"] * 100,
+        "F1_macro": metrics["f1_macro"] * 100,
+        "F1_weighted": metrics["f1_weighted"] * 100,
+        "seconds": seconds,
     }
 
-    return metrics
 
-# =========================
-# LOAD MODELS
-# =========================
-print("\n📦 Loading models...")
+def evaluate_all(models):
+    """Metrics per model (same order), in parallel worker processes when WORKERS > 1."""
+    workers = max(1, min(WORKERS or len(models), len(models), CPUS))
 
-distil_tokenizer = DistilBertTokenizer.from_pretrained(DISTIL_MODEL_PATH)
-distil_model = DistilBertForSequenceClassification.from_pretrained(DISTIL_MODEL_PATH)
-distil_model.eval()
+    if workers == 1:
+        return [evaluate_model(m["path"], m["name"]) for m in models]
 
-bert_tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_PATH)
-bert_model = BertForSequenceClassification.from_pretrained(BERT_MODEL_PATH)
-bert_model.eval()
+    threads = max(1, CPUS // workers)
+    print(f"⚙️ {len(models)} models on {workers} workers × {threads} threads")
+
+    # spawn → fresh interpreters, no torch thread pools inherited through fork
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=ctx,
+        initializer=init_worker, initargs=(ctx.Value("i", 0), workers, threads)
+    ) as pool:
+        futures = [pool.submit(evaluate_model, m["path"], m["name"], threads) for m in models]
+        return [f.result() for f in futures]
 
-# =========================
-# RUN EVALUATION
-# =========================
-distil_metrics = evaluate_model(distil_model, distil_tokenizer, "DistilBERT")
-bert_metrics   = evaluate_model(bert_model, bert_tokenizer, "BERT-base")
 
 def plot_single_model(metrics, model_name, filename, color):
     labels_main = ["F1_micro", "Accuracy", "Precision", "Recall"]
@@ -188,107 +204,125 @@ def plot_single_model(metrics, model_name, filename, color):
 
     print(f"✅ Saved: {filename}")
 
-# =========================
-# PLOTTING
-# =========================
-labels_main = ["F1_micro", "Accuracy", "Precision", "Recall"]
-
-fig = plt.figure(figsize=(18, 12))
-
-# --- 1. Main Performance Metrics ---
-ax1 = plt.subplot(2, 2, 1)
-x = np.arange(len(labels_main))
-width = 0.35
-
-ax1.bar(x - width/2, [distil_metrics[k] for k in labels_main],
-        width, label="DistilBERT", color="#9D4EDD")
-ax1.bar(x + width/2, [bert_metrics[k] for k in labels_main],
-        width, label="BERT-base", color="#C77DFF")
-
-ax1.set_xticks(x)
-ax1.set_xticklabels(["F1", "Accuracy", "Precision", "Recall"])
-ax1.set_ylim(0, 100)
-ax1.set_title("Main Performance Metrics (Inference-Time)")
-ax1.set_ylabel("Score (%)")
-ax1.legend()
-ax1.grid(axis="y", alpha=0.3)
-
-# --- 2. F1 Comparison ---
-ax2 = plt.subplot(2, 2, 2)
-f1_labels = ["F1_micro", "F1_macro", "F1_weighted"]
-
-ax2.bar(x[:3] - width/2, [distil_metrics[k] for k in f1_labels],
-        width, label="DistilBERT", color="#9D4EDD")
-ax2.bar(x[:3] + width/2, [bert_metrics[k] for k in f1_labels],
-        width, label="BERT-base", color="#C77DFF")
-
-ax2.set_xticks(x[:3])
-ax2.set_xticklabels(["Micro", "Macro", "Weighted"])
-ax2.set_ylim(0, 100)
-ax2.set_title("F1 Score Comparison")
-ax2.set_ylabel("F1 Score (%)")
-ax2.legend()
-ax2.grid(axis="y", alpha=0.3)
-
-# --- 3. Radar Chart ---
-ax3 = plt.subplot(2, 2, 3, polar=True)
-radar_labels = ["F1_micro", "Accuracy", "Precision", "Recall"]
-angles = np.linspace(0, 2 * np.pi, len(radar_labels), endpoint=False)
-angles = np.concatenate([angles, [angles[0]]])
-
-distil_vals = [distil_metrics[k] for k in radar_labels]
-bert_vals   = [bert_metrics[k] for k in radar_labels]
-distil_vals += distil_vals[:1]
-bert_vals   += bert_vals[:1]
-
-ax3.plot(angles, distil_vals, label="DistilBERT", color="#9D4EDD")
-ax3.fill(angles, distil_vals, alpha=0.25, color="#9D4EDD")
-ax3.plot(angles, bert_vals, label="BERT-base", color="#C77DFF")
-ax3.fill(angles, bert_vals, alpha=0.25, color="#C77DFF")
-
-ax3.set_thetagrids(angles[:-1] * 180/np.pi, ["F1", "Acc", "Prec", "Rec"])
-ax3.set_ylim(0, 100)
-ax3.set_title("Performance Radar Chart")
-ax3.legend(loc="upper right")
-
-# --- 4. Table ---
-ax4 = plt.subplot(2, 2, 4)
-ax4.axis("off")
-
-table_data = [
-    ["Metric", "DistilBERT", "BERT-base"],
-    ["F1 (Micro)", f"{distil_metrics['F1_micro']:.2f}%", f"{bert_metrics['F1_micro']:.2f}%"],
-    ["F1 (Macro)", f"{distil_metrics['F1_macro']:.2f}%", f"{bert_metrics['F1_macro']:.2f}%"],
-    ["Accuracy",   f"{distil_metrics['Accuracy']:.2f}%", f"{bert_metrics['Accuracy']:.2f}%"],
-    ["Precision",  f"{distil_metrics['Precision']:.2f}%", f"{bert_metrics['Precision']:.2f}%"],
-    ["Recall",     f"{distil_metrics['Recall']:.2f}%", f"{bert_metrics['Recall']:.2f}%"],
-]
-
-table = ax4.table(cellText=table_data[1:],
-                  colLabels=table_data[0],
-                  loc="center",
-                  cellLoc="center")
-table.scale(1, 2)
-ax4.set_title("Detailed Performance Summary")
-
-plt.tight_layout()
-plt.savefig("distilbert_vs_bert_comparison.png", dpi=300)
+def plot_comparison(models, results, filename):
+    labels_main = ["F1_micro", "Accuracy", "Precision", "Recall"]
+    n = len(models)
 
-# =========================
-# SINGLE MODEL FIGURES
-# =========================
-plot_single_model(
-    distil_metrics,
-    model_name="DistilBERT (Baseline)",
-    filename="distilbert_performance.png",
-    color="#9D4EDD"
-)
-
-plot_single_model(
-    bert_metrics,
-    model_name="BERT-base (Final Model)",
-    filename="bert_performance.png",
-    color="#C77DFF"
-)
-
-print("\n✅ Saved: distilbert_vs_bert_comparison.png")
+    fig = plt.figure(figsize=(18, 12))
+
+    # --- 1. Main Performance Metrics ---
+    ax1 = plt.subplot(2, 2, 1)
+    x = np.arange(len(labels_main))
+    width = 0.7 / n
+    offsets = (np.arange(n) - (n - 1) / 2) * width
+
+    for m, metrics, off in zip(models, results, offsets):
+        ax1.bar(x + off, [metrics[k] for k in labels_main],
+                width, label=m["name"], color=m["color"])
+
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(["F1", "Accuracy", "Precision", "Recall"])
+    ax1.set_ylim(0, 100)
+    ax1.set_title("Main Performance Metrics (Inference-Time)")
+    ax1.set_ylabel("Score (%)")
+    ax1.legend()
+    ax1.grid(axis="y", alpha=0.3)
+
+    # --- 2. F1 Comparison ---
+    ax2 = plt.subplot(2, 2, 2)
+    f1_labels = ["F1_micro", "F1_macro", "F1_weighted"]
+
+    for m, metrics, off in zip(models, results, offsets):
+        ax2.bar(x[:3] + off, [metrics[k] for k in f1_labels],
+                width, label=m["name"], color=m["color"])
+
+    ax2.set_xticks(x[:3])
+    ax2.set_xticklabels(["Micro", "Macro", "Weighted"])
+    ax2.set_ylim(0, 100)
+    ax2.set_title("F1 Score Comparison")
+    ax2.set_ylabel("F1 Score (%)")
+    ax2.legend()
+    ax2.grid(axis="y", alpha=0.3)
+
+    # --- 3. Radar Chart ---
+    ax3 = plt.subplot(2, 2, 3, polar=True)
+    radar_labels = ["F1_micro", "Accuracy", "Precision", "Recall"]
+    angles = np.linspace(0, 2 * np.pi, len(radar_labels), endpoint=False)
+    angles = np.concatenate([angles, [angles[0]]])
+
+    for m, metrics in zip(models, results):
+        vals = [metrics[k] for k in radar_labels]
+        vals += vals[:1]
+        ax3.plot(angles, vals, label=m["name"], color=m["color"])
+        ax3.fill(angles, vals, alpha=0.25, color=m["color"])
+
+    ax3.set_thetagrids(angles[:-1] * 180/np.pi, ["F1", "Acc", "Prec", "Rec"])
+    ax3.set_ylim(0, 100)
+    ax3.set_title("Performance Radar Chart")
+    ax3.legend(loc="upper right")
+
+    # --- 4. Table ---
+    ax4 = plt.subplot(2, 2, 4)
+    ax4.axis("off")
+
+    rows = [
+        ("F1 (Micro)", "F1_micro"),
+        ("F1 (Macro)", "F1_macro"),
+        ("Accuracy", "Accuracy"),
+        ("Precision", "Precision"),
+        ("Recall", "Recall"),
+    ]
+    table_data = [["Metric"] + [m["name"] for m in models]]
+    table_data += [[title] + [f"{metrics[k]:.2f}%" for metrics in results] for title, k in rows]
+
+    table = ax4.table(cellText=table_data[1:],
+                      colLabels=table_data[0],
+                      loc="center",
+                      cellLoc="center")
+    table.scale(1, 2)
+    ax4.set_title("Detailed Performance Summary")
+
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300)
+    plt.close()
+
+    print(f"✅ Saved: {filename}")
+
+
+def print_table(models, results):
+    keys = ["F1_micro", "F1_macro", "F1_weighted", "Accuracy", "Precision", "Recall", "seconds"]
+    width = max(12, max(len(m["name"]) for m in models) + 2)
+
+    print("\n📊 INFERENCE-TIME COMPARISON")
+    print("Model".ljust(width) + "".join(k.rjust(13) for k in keys))
+    for m, metrics in zip(models, results):
+        print(m["name"].ljust(width) + "".join(f"{metrics[k]:13.2f}" for k in keys))
+
+
+def main():
+    model_paths = sys.argv[1:] or DEFAULT_MODEL_PATHS
+    models = [describe(path, i) for i, path in enumerate(model_paths)]
+
+    print("🔍 Evaluating on the GoEmotions test set...")
+    start = time.perf_counter()
+    results = evaluate_all(models)
+    wall = time.perf_counter() - start
+
+    print_table(models, results)
+    print(f"\n⏱️ Wall time {wall:.1f}s (sum of per-model times {sum(r['seconds'] for r in results):.1f}s)")
+
+    # =========================
+    # PLOTTING
+    # =========================
+    comparison = "distilbert_vs_bert_comparison.png" if model_paths == DEFAULT_MODEL_PATHS else "model_comparison.png"
+    plot_comparison(models, results, comparison)
+
+    # =========================
+    # SINGLE MODEL FIGURES
+    # =========================
+    for m, metrics in zip(models, results):
+        plot_single_model(metrics, model_name=m["title"], filename=m["filename"], color=m["color"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,15 @@
-from datasets import load_dataset
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
-import torch
+from transformers import DistilBertForSequenceClassification
 import numpy as np
 from sklearn.metrics import f1_score, accuracy_score, precision_score, recall_score, classification_report, confusion_matrix
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-print("Loading model and dataset...")
+from moodify_core.data import predict_logits
+from moodify_core.goemotions import load_split
+from moodify_core.logits_cache import load_or_compute
+from moodify_core.tokenization import load_tokenizer
 
-# Load model
-model = DistilBertForSequenceClassification.from_pretrained("./model")
-tokenizer = DistilBertTokenizer.from_pretrained("./model")
-model.eval()
-
-# Load test dataset
-dataset = load_dataset("go_emotions")
-test = dataset["test"]
+MODEL_PATH = "./model"
 
 # Labels
 labels = [
@@ -26,46 +20,30 @@ labels = [
     "remorse", "sadness", "surprise", "neutral"
 ]
 
-print(f"Evaluating on {len(test)} test samples...")
-
-# Prepare data
-def tokenize_batch(texts):
-    return tokenizer(texts, truncation=True, padding=True, max_length=128, return_tensors="pt")
-
-# Run evaluation
-all_preds = []
-all_labels = []
-batch_size = 32
-
-with torch.no_grad():
-    for i in range(0, len(test), batch_size):
-        batch = test[i:i+batch_size]
-        texts = batch["text"]
-        true_labels = batch["labels"]
-        
-        # Tokenize
-        inputs = tokenize_batch(texts)
-        
-        # Predict
-        outputs = model(**inputs)
-        logits = outputs.logits
-        probs = torch.sigmoid(logits)
-        preds = (probs > 0.5).int().cpu().numpy()
-        
-        # Convert true labels to multi-hot encoding
-        for labs in true_labels:
-            row = [0] * 28
-            for idx in labs:
-                row[idx] = 1
-            all_labels.append(row)
-        
-        all_preds.extend(preds)
-        
-        if (i // batch_size + 1) % 10 == 0:
-            print(f"Processed {i+batch_size}/{len(test)} samples...")
-
-all_preds = np.array(all_preds)
-all_labels = np.array(all_labels)
+
+def run_model():
+    print("Loading model and dataset...")
+
+    # Load model
+    model = DistilBertForSequenceClassification.from_pretrained(MODEL_PATH)
+    tokenizer = load_tokenizer(MODEL_PATH)
+    model.eval()
+
+    # Load test dataset (prepared token ids, memory-mapped)
+    test = load_split("test", tokenizer, max_length=128)
+
+    print(f"Evaluating on {len(test)} test samples...")
+
+    # length-bucketed batches, each padded only to its longest text
+    logits = predict_logits(
+        model, tokenizer, test.texts, max_length=128, batch_size=32, log_every=10, encodings=test.encodings()
+    )
+    return logits.numpy(), test.labels
+
+
+# Run evaluation (logits are cached on disk after the first run)
+logits, all_labels = load_or_compute(MODEL_PATH, "go_emotions/test", 128, run_model)
+all_preds = (logits > 0).astype(int)  # sigmoid(x) > 0.5  ⇔  x > 0
 
 print("\nCalculating metrics...")
 
@@ -1,95 +1,76 @@
 import json
+import os
 import torch
-import numpy as np
 from datasets import load_dataset
-from transformers import BertTokenizer, BertForSequenceClassification
-from sklearn.metrics import f1_score, accuracy_score, precision_score, recall_score
+from transformers import BertForSequenceClassification
 
-print("🔍 Loading model, tokenizer, thresholds...")
+from moodify_core.evaluation import dataset_batches, evaluate_probs, run_inference, stream_evaluate
+from moodify_core.goemotions import load_split
+from moodify_core.logits_cache import load_or_compute
+from moodify_core.postprocess import EmotionPostProcessor
+from moodify_core.tokenization import load_tokenizer
 
-tokenizer = BertTokenizer.from_pretrained("./modelsequence")
-model = BertForSequenceClassification.from_pretrained("./modelsequence")
-model.eval()
+MODEL_PATH = "./modelsequence"
 
-with open("./model/optimized_thresholds.json") as f:
-    THRESHOLDS = json.load(f)
+# EVAL_STREAMING=1 → stream the split chunk by chunk (no logits cache, flat memory),
+# for corpora much larger than the GoEmotions test split
+STREAMING = os.getenv("EVAL_STREAMING") == "1"
+STREAM_CHUNK_SIZE = 1024
 
-LABELS = [
-  "admiration","amusement","anger","annoyance","approval","caring",
-  "confusion","curiosity","desire","disappointment","disapproval","disgust",
-  "embarrassment","excitement","fear","gratitude","grief","joy",
-  "love","nervousness","optimism","pride","realization","relief",
-  "remorse","sadness","surprise","neutral"
-]
-
-TOP_K = 3
-MIN_CONFIDENCE = 0.15
-
-RARE_FALLBACK = {
-    "grief": "sadness",
-    "relief": "neutral",
-    "realization": "neutral"
-}
-
-dataset = load_dataset("go_emotions")
-test = dataset["test"]
-
-all_preds = []
-all_labels = []
-
-print(f"Evaluating on {len(test)} samples...")
-
-for sample in test:
-    text = sample["text"]
-    true = sample["labels"]
-
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    )
+# 🔹 Inference: texts per forward pass, torch threads (0 → torch default)
+BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "64"))
+THREADS = int(os.getenv("EVAL_THREADS", "0"))
 
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        probs = torch.sigmoid(logits)[0]
+print("🔍 Loading thresholds + test set...")
 
-    preds = [0] * 28
+with open("./model/optimized_thresholds.json") as f:
+    THRESHOLDS = json.load(f)
+
+# thresholds + length penalty + MIN_CONFIDENCE + TOP_K, shared with the service
+postprocessor = EmotionPostProcessor(THRESHOLDS)
 
-    text_len = len(text.split())
-    length_penalty = 0.05 if text_len < 4 else 0.0
 
-    scored = []
+def load_model():
+    print("🔍 Loading model, tokenizer...")
+    if THREADS:
+        torch.set_num_threads(THREADS)
+    tokenizer = load_tokenizer(MODEL_PATH)
+    model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
+    model.eval()
+    return model, tokenizer
 
-    for i, score in enumerate(probs):
-        emotion = LABELS[i]
-        threshold = THRESHOLDS.get(emotion, 0.3) + length_penalty
-        score_val = score.item()
 
-        if score_val >= threshold and score_val >= MIN_CONFIDENCE:
-            scored.append((i, score_val))
+if STREAMING:
+    test = load_dataset("go_emotions", split="test", streaming=True)
+    model, tokenizer = load_model()
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    scored = scored[:TOP_K]
+    print("Evaluating (streaming)...")
+    metrics = stream_evaluate(
+        model, tokenizer, postprocessor,
+        dataset_batches(test, STREAM_CHUNK_SIZE), max_length=128, batch_size=BATCH_SIZE
+    )
+else:
+    test = load_split("test")   # prepared by prepare_data.py, memory-mapped
 
-    for idx, _ in scored:
-        preds[idx] = 1
+    def run_model():
+        print("🔍 Loading model, tokenizer...")
+        logits = run_inference(
+            BertForSequenceClassification, MODEL_PATH, test.texts,
+            max_length=128, batch_size=BATCH_SIZE, threads=THREADS, split="test"
+        )
+        return logits.numpy(), test.labels
 
-    gt = [0] * 28
-    for l in true:
-        gt[l] = 1
+    print(f"Evaluating on {len(test)} samples...")
 
-    all_preds.append(preds)
-    all_labels.append(gt)
+    logits, labels = load_or_compute(MODEL_PATH, "go_emotions/test", 128, run_model)
 
-all_preds = np.array(all_preds)
-all_labels = np.array(all_labels)
+    # memory-mapped logits scored chunk by chunk (sigmoid per chunk)
+    metrics = evaluate_probs(postprocessor, logits, test.texts, labels, from_logits=True)
 
 print("\n📊 FINAL METRICS (Inference-Time Optimized)")
 
-print(f"Accuracy:  {accuracy_score(all_labels, all_preds):.4f}")
-print(f"F1 Micro:  {f1_score(all_labels, all_preds, average='micro'):.4f}")
-print(f"F1 Macro:  {f1_score(all_labels, all_preds, average='macro'):.4f}")
-print(f"Precision: {precision_score(all_labels, all_preds, average='micro'):.4f}")
-print(f"Recall:    {recall_score(all_labels, all_preds, average='micro'):.4f}")
+print(f"Accuracy:  {metrics['accuracy']:.4f}")
+print(f"F1 Micro:  {metrics['f1_micro']:.4f}")
+print(f"F1 Macro:  {metrics['f1_macro']:.4f}")
+print(f"Precision: {metrics['precision']:.4f}")
+print(f"Recall:    {metrics['recall']:.4f}")
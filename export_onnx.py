@@ -0,0 +1,83 @@
+# export_onnx.py
+# One-time ONNX export for the service (MODEL_BACKEND=onnx).
+import inspect
+import os
+import sys
+from pathlib import Path
+
+import torch
+from transformers import BertForSequenceClassification
+
+from moodify_core.backends import ONNX_FILENAME, OnnxBackend
+from moodify_core.tokenization import SAMPLE_TEXTS, load_tokenizer
+
+# same setting (and default) as model_service/runtime.py → the export lands
+# next to the weights the service actually loads
+MODEL_PATH = os.getenv("MODEL_PATH", str(Path(__file__).resolve().parent / "modelsequence"))
+OPSET = 14
+
+# max |logit_onnx - logit_torch| allowed on the check sentences
+ATOL = 1e-4
+
+
+class LogitsOnly(torch.nn.Module):
+    """Positional inputs → logits, so the graph has plain tensor I/O."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *args):
+        return self.model(**dict(zip(self.input_names, args))).logits
+
+
+print("📌 Loading model & tokenizer...")
+tokenizer = load_tokenizer(MODEL_PATH)
+model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
+model.eval()
+
+input_names = list(tokenizer.model_input_names)
+onnx_path = os.path.join(MODEL_PATH, ONNX_FILENAME)
+
+# batch of 2 with padding → batch/sequence axes are really dynamic
+dummy = tokenizer(SAMPLE_TEXTS[:2], return_tensors="pt", padding=True)
+
+# newer torch defaults to the dynamo exporter; keep the TorchScript one (dynamic_axes)
+exporter_kwargs = {}
+if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+    exporter_kwargs["dynamo"] = False
+
+print(f"📌 Exporting to {onnx_path} ...")
+with torch.no_grad():
+    torch.onnx.export(
+        LogitsOnly(model, input_names).eval(),
+        tuple(dummy[name] for name in input_names),
+        onnx_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes={
+            **{name: {0: "batch", 1: "sequence"} for name in input_names},
+            "logits": {0: "batch"},
+        },
+        opset_version=OPSET,
+        do_constant_folding=True,
+        **exporter_kwargs
+    )
+
+print("📌 Checking ONNX Runtime logits against PyTorch...")
+check = tokenizer(SAMPLE_TEXTS, return_tensors="pt", padding=True, truncation=True, max_length=128)
+
+with torch.no_grad():
+    torch_logits = model(**check).logits
+
+onnx_logits = OnnxBackend(onnx_path).logits(check)
+max_diff = (onnx_logits - torch_logits).abs().max().item()
+print(f"max |Δlogit| = {max_diff:.2e}")
+
+if max_diff > ATOL:
+    os.remove(onnx_path)
+    print(f"❌ Difference exceeds ATOL={ATOL}, export removed.")
+    sys.exit(1)
+
+print(f"✅ Saved {onnx_path}")
@@ -0,0 +1,5 @@
+"""FastAPI model service for the Moodify emotion model.
+
+Run from the repository root: `uvicorn model_service.app:app`. Tests and
+tools import it the same way (`from model_service.app import app`).
+"""
@@ -1,90 +1,135 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-import torch
-import json
-from transformers import BertTokenizer, BertForSequenceClassification
+from typing import List, Optional
+import asyncio
+import os
+import queue
 
-app = FastAPI()
+from .runtime import get_runtime
 
-print("🚀 Loading BERT model & tokenizer...")
+# 🔹 Bulk endpoint limits
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "32"))
+PREDICT_BATCH_MAX_TEXTS = int(os.getenv("PREDICT_BATCH_MAX_TEXTS", "1000"))
 
-# 🔹 BERT-base model (friend model)
-MODEL_PATH = "../modelsequence"   # <- BERT modelinin olduğu klasör
+# 🔹 /predict (and each /predict_batch chunk) waits at most this long for the model,
+#    then gives up (504)
+REQUEST_TIMEOUT_S = float(os.getenv("REQUEST_TIMEOUT_S", "2"))
 
-tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
-model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
-model.eval()
+@asynccontextmanager
+async def lifespan(app):
+    # load before accepting traffic; importing this module stays cheap
+    get_runtime()
+    yield
 
-# 🔹 Optimized thresholds
-with open("thresholds.json") as f:
-    THRESHOLDS = json.load(f)
-
-LABELS = [
-  "admiration","amusement","anger","annoyance","approval","caring",
-  "confusion","curiosity","desire","disappointment","disapproval","disgust",
-  "embarrassment","excitement","fear","gratitude","grief","joy",
-  "love","nervousness","optimism","pride","realization","relief",
-  "remorse","sadness","surprise","neutral"
-]
-
-# 🔧 Inference-time improvements (NO TRAINING)
-TOP_K = 3
-MIN_CONFIDENCE = 0.15
-
-RARE_FALLBACK = {
-    "grief": "sadness",
-    "relief": "neutral",
-    "realization": "neutral"
-}
+app = FastAPI(lifespan=lifespan)
 
 class TextRequest(BaseModel):
     text: str
-
-@app.post("/predict")
-def predict(req: TextRequest):
-    inputs = tokenizer(
-        req.text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
+    meta: bool = False   # add the meta-emotion layer to the response
+
+class BatchRequest(BaseModel):
+    texts: List[str]
+    ids: Optional[List[str]] = None
+    meta: bool = False
+
+def public(result, meta):
+    if meta:
+        return result
+    return {k: v for k, v in result.items() if k != "meta"}
+
+def overloaded():
+    return HTTPException(
+        status_code=503,
+        detail="inference queue is full, retry later",
+        headers={"Retry-After": "1"}
     )
 
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        probs = torch.sigmoid(logits)[0]  # multi-label → sigmoid
-
-    emotions = []
-
-    text_len = len(req.text.split())
-    length_penalty = 0.05 if text_len < 4 else 0.0
-
-    for i, score in enumerate(probs):
-        emotion = LABELS[i]
-        base_threshold = THRESHOLDS.get(emotion, 0.3)
-        threshold = base_threshold + length_penalty
-
-        score_val = round(score.item(), 3)
-
-        if score_val >= threshold and score_val >= MIN_CONFIDENCE:
-            emotions.append({
-                "name": emotion,
-                "score": score_val
-            })
-
-    # sort by confidence
-    emotions.sort(key=lambda x: x["score"], reverse=True)
-
-    # top-k
-    emotions = emotions[:TOP_K]
-
-    if emotions:
-        primary = emotions[0]["name"]
-        primary = RARE_FALLBACK.get(primary, primary)
-    else:
-        primary = "neutral"
-
+@app.post("/predict")
+async def predict(req: TextRequest):
+    rt = get_runtime()
+    with rt.metrics.request("/predict"):
+        result = rt.cache.get(req.text)
+        if result is None:
+            # event loop only waits; the forward pass runs on the batcher thread
+            try:
+                future = rt.batcher.submit(req.text)
+            except queue.Full:
+                raise overloaded()
+
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), REQUEST_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                # cancels the queued item too, so the model never runs it
+                raise HTTPException(status_code=504, detail="inference timed out")
+
+            rt.cache.put(req.text, result)
+
+        return public(result, req.meta)
+
+@app.post("/predict_batch")
+async def predict_batch(req: BatchRequest):
+    if req.ids is not None and len(req.ids) != len(req.texts):
+        raise HTTPException(status_code=400, detail="ids must match texts in length")
+    if len(req.texts) > PREDICT_BATCH_MAX_TEXTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"at most {PREDICT_BATCH_MAX_TEXTS} texts per call"
+        )
+
+    rt = get_runtime()
+
+    with rt.metrics.request("/predict_batch"):
+        results = [rt.cache.get(text) for text in req.texts]
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        # similar lengths queue next to each other → less padding per forward pass
+        order = sorted(misses, key=lambda i: len(req.texts[i]))
+
+        # chunks go through the same bounded queue + batcher thread as /predict,
+        # one at a time → a large call can't crowd out single-text traffic
+        chunk_size = min(PREDICT_BATCH_CHUNK_SIZE, rt.batcher.max_queue or PREDICT_BATCH_CHUNK_SIZE)
+        for offset in range(0, len(order), chunk_size):
+            chunk = order[offset:offset + chunk_size]
+            try:
+                futures = rt.batcher.submit_many([req.texts[i] for i in chunk])
+            except queue.Full:
+                raise overloaded()
+
+            try:
+                responses = await asyncio.wait_for(
+                    asyncio.gather(*[asyncio.wrap_future(f) for f in futures]), REQUEST_TIMEOUT_S
+                )
+            except asyncio.TimeoutError:
+                # cancels the chunk's queued items too
+                raise HTTPException(status_code=504, detail="inference timed out")
+
+            for i, result in zip(chunk, responses):
+                rt.cache.put(req.texts[i], result)
+                results[i] = result
+
+        results = [public(result, req.meta) for result in results]
+
+        if req.ids is not None:
+            results = [{"id": id_, **result} for id_, result in zip(req.ids, results)]
+
+        return {"results": results}
+
+@app.get("/metrics")
+def metrics():
+    rt = get_runtime()
     return {
-        "emotions": emotions,
-        "primaryEmotion": primary
+        "startup": rt.startup,
+        "batching": rt.batcher.stats(),
+        "cache": rt.cache.stats(),
+        "latency": rt.metrics.summary()
     }
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def metrics_prometheus():
+    rt = get_runtime()
+    return PlainTextResponse(
+        rt.metrics.prometheus(rt.batcher.stats(), rt.cache.stats()),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Groups concurrent single-text requests into one padded forward pass.
+
+    A request waits at most `max_wait_ms` for companions and a batch never
+    grows past `max_batch_size` rows. `run_batch` gets the list of queued
+    items and must return one result per item, in the same order.
+
+    At most `max_queue` items may wait (0 = unbounded); `submit` raises
+    `queue.Full` beyond that, and `submit_many` queues all of its items or
+    none. Futures cancelled while still queued are
+    dropped before they reach `run_batch`. `on_queue_wait`, if given, gets
+    the seconds each item of a batch spent queued.
+    """
+
+    def __init__(self, run_batch, max_batch_size=16, max_wait_ms=5.0, max_queue=0,
+                 on_queue_wait=None):
+        self.run_batch = run_batch
+        self.on_queue_wait = on_queue_wait
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue = max(0, int(max_queue))
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._submit_lock = threading.Lock()   # producers only; the loop never takes it
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+        self._thread = threading.Thread(
+            target=self._loop, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item):
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items):
+        futures = [Future() for _ in items]
+        now = time.perf_counter()
+
+        # the queue only drains while we hold the lock → the room check holds
+        with self._submit_lock:
+            if self.max_queue and self._queue.qsize() + len(items) > self.max_queue:
+                with self._lock:
+                    self._rejected += 1
+                raise queue.Full
+            for item, future in zip(items, futures):
+                self._queue.put_nowait((item, future, now))
+        return futures
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # window closed → only take what is already waiting
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self):
+        while True:
+            collected = self._collect()
+
+            # timed-out callers cancel their future → skip them
+            batch = [entry for entry in collected if entry[1].set_running_or_notify_cancel()]
+            if len(batch) < len(collected):
+                with self._lock:
+                    self._cancelled += len(collected) - len(batch)
+            if not batch:
+                continue
+
+            if self.on_queue_wait is not None:
+                now = time.perf_counter()
+                self.on_queue_wait([now - queued for _, _, queued in batch])
+
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+
+            try:
+                results = self.run_batch(items)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._batches += 1
+                self._items += len(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": (
+                    round(self._items / self._batches, 3) if self._batches else 0.0
+                ),
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+            }
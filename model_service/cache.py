@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def fingerprint_dir(path):
+    """Cheap version tag for a model folder (file names, sizes, mtimes)."""
+    h = hashlib.sha1()
+    for name in sorted(os.listdir(path)):
+        st = os.stat(os.path.join(path, name))
+        h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:12]
+
+
+def fingerprint_json(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU of final responses keyed by normalized text.
+
+    Keys carry the version of the model, thresholds and inference settings
+    the runtime was built with (fixed at startup, reported by `stats()`).
+    `max_size=0` disables caching.
+    """
+
+    def __init__(self, max_size, normalize, version=()):
+        self.max_size = max(0, int(max_size))
+        self.normalize = normalize
+        self.version = tuple(version)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text):
+        return (self.version, self.normalize(text))
+
+    def get(self, text):
+        if not self.max_size:
+            return None
+
+        key = self.key(text)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, text, value):
+        if not self.max_size:
+            return
+
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "version": list(self.version),
+            }
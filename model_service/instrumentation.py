@@ -0,0 +1,175 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+TOKEN_BUCKETS = (8, 16, 24, 32, 48, 64, 96, 128)
+
+STAGES = ("tokenize", "forward", "postprocess", "meta")
+ENDPOINTS = ("/predict", "/predict_batch")
+# handler outcomes: served, shed (queue full), timed out, failed
+STATUSES = ("200", "503", "504", "500")
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus `le` semantics); observe() is a bisect + lock."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # last slot → +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def observe_many(self, values):
+        idx = [bisect.bisect_left(self.buckets, v) for v in values]
+        with self._lock:
+            for i in idx:
+                self._counts[i] += 1
+            self._sum += sum(values)
+            self._count += len(idx)
+
+    def snapshot(self):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q, snapshot=None):
+        """Upper bound of the bucket holding quantile `q` (None if empty / in +Inf)."""
+        cumulative, _, count = snapshot or self.snapshot()
+        if not count:
+            return None
+        i = bisect.bisect_left(cumulative, q * count)
+        return self.buckets[i] if i < len(self.buckets) else None
+
+    def summary(self):
+        snap = self.snapshot()
+        _, total, count = snap
+        return {
+            "count": count,
+            "mean": round(total / count, 6) if count else 0.0,
+            "p50_le": self.quantile(0.50, snap),
+            "p95_le": self.quantile(0.95, snap),
+            "p99_le": self.quantile(0.99, snap),
+        }
+
+
+def process_rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ServiceMetrics:
+    """Latency / batch / token-length histograms of the model service."""
+
+    def __init__(self):
+        self.stage_seconds = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.request_seconds = {
+            (endpoint, status): Histogram(LATENCY_BUCKETS) for endpoint in ENDPOINTS for status in STATUSES
+        }
+        self.queue_wait_seconds = Histogram(LATENCY_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.input_tokens = Histogram(TOKEN_BUCKETS)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name].observe(time.perf_counter() - start)
+
+    @contextmanager
+    def request(self, endpoint):
+        """Times a handler, shed (503) and timed-out (504) calls included, by response status."""
+        start = time.perf_counter()
+        status = "200"
+        try:
+            yield
+        except Exception as e:
+            status = str(getattr(e, "status_code", 500))
+            raise
+        finally:
+            key = (endpoint, status if status in STATUSES else "500")
+            self.request_seconds[key].observe(time.perf_counter() - start)
+
+    def summary(self):
+        return {
+            "stage_seconds": {k: h.summary() for k, h in self.stage_seconds.items()},
+            "request_seconds": {
+                endpoint: {status: self.request_seconds[endpoint, status].summary() for status in STATUSES}
+                for endpoint in ENDPOINTS
+            },
+            "queue_wait_seconds": self.queue_wait_seconds.summary(),
+            "batch_size": self.batch_size.summary(),
+            "input_tokens": self.input_tokens.summary(),
+            "rss_bytes": process_rss_bytes(),
+        }
+
+    def prometheus(self, batching, cache):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        def histogram(name, help_text, hists, label=None):
+            # `label` is one label name, or a tuple of names for tuple keys
+            names = label if isinstance(label, tuple) else (label,)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in hists.items():
+                values = key if isinstance(key, tuple) else (key,)
+                base = "".join(f'{n}="{v}",' for n, v in zip(names, values)) if label else ""
+                cumulative, total, count = h.snapshot()
+                for le, c in zip(h.buckets, cumulative):
+                    lines.append(f'{name}_bucket{{{base}le="{le}"}} {c}')
+                lines.append(f'{name}_bucket{{{base}le="+Inf"}} {cumulative[-1]}')
+                tags = "{" + base.rstrip(",") + "}" if base else ""
+                lines.append(f"{name}_sum{tags} {total}")
+                lines.append(f"{name}_count{tags} {count}")
+
+        def metric(name, kind, help_text, value):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+        histogram("moodify_stage_seconds", "Time per inference stage.", self.stage_seconds, "stage")
+        histogram("moodify_request_seconds", "End-to-end handler latency by response status.",
+                  self.request_seconds, ("endpoint", "status"))
+        histogram("moodify_queue_wait_seconds", "Time a text waits for its micro-batch.",
+                  {None: self.queue_wait_seconds})
+        histogram("moodify_batch_size", "Model input rows (texts, or windows of long texts) per forward pass.",
+                  {None: self.batch_size})
+        histogram("moodify_input_tokens", "Tokens per model input row (a text, or one window of a long text).",
+                  {None: self.input_tokens})
+
+        metric("moodify_inference_queue_depth", "gauge", "Texts waiting for the model.", batching["queue_depth"])
+        metric("moodify_inference_rejected_total", "counter", "Requests shed with 503.", batching["rejected"])
+        metric("moodify_inference_cancelled_total", "counter", "Timed-out texts dropped before inference.", batching["cancelled"])
+        metric("moodify_cache_hits_total", "counter", "Prediction cache hits.", cache["hits"])
+        metric("moodify_cache_misses_total", "counter", "Prediction cache misses.", cache["misses"])
+        metric("moodify_cache_evictions_total", "counter", "Prediction cache evictions.", cache["evictions"])
+        metric("moodify_cache_hit_ratio", "gauge", "Prediction cache hit ratio.", cache["hit_ratio"])
+        metric("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.", process_rss_bytes())
+
+        return "\n".join(lines) + "\n"
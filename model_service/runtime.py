@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import torch
+from transformers import BertForSequenceClassification
+
+from moodify_core.labels import LABELS
+from moodify_core.text import normalize_text
+from moodify_core.tokenization import load_tokenizer
+from moodify_core.backends import TorchBackend, load_onnx
+from moodify_core.quantization import load_int8
+from moodify_core.shared_weights import load_shared
+from moodify_core.windows import encode_windows, pool_windows
+from moodify_core.meta import META_EMOTIONS, map_to_meta_emotion_batch, meta_response
+from moodify_core.postprocess import (
+    EmotionPostProcessor, TOP_K, MIN_CONFIDENCE, RARE_FALLBACK
+)
+
+from .batching import MicroBatcher
+from .cache import PredictionCache, fingerprint_dir, fingerprint_json
+from .instrumentation import ServiceMetrics
+
+SERVICE_DIR = Path(__file__).resolve().parent
+
+# 🔹 BERT-base model (friend model) + optimized thresholds, relative to this file
+#    → the service starts from any working directory
+MODEL_PATH = os.getenv("MODEL_PATH", str(SERVICE_DIR.parent / "modelsequence"))
+THRESHOLDS_PATH = os.getenv("THRESHOLDS_PATH", str(SERVICE_DIR / "thresholds.json"))
+
+# 🔹 Backend: "torch" or "onnx" (ONNX Runtime, export from export_onnx.py)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+
+# 🔹 Precision (torch backend): "fp32" or "int8" (pre-quantized export from quantize_model.py)
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+INT8_MAX_F1_DROP = float(os.getenv("INT8_MAX_F1_DROP", "0.01"))
+
+# 🔹 Multi-worker serving: `WEB_CONCURRENCY=N uvicorn model_service.app:app` (uvicorn reads it as
+#    --workers; workers read it to split the cores). fp32 weights are memory-mapped
+#    from model.safetensors → N workers share one physical copy of the weights.
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0")) or max(1, CPUS // WORKERS)
+
+# 🔹 Long texts (voice transcripts): "truncate" keeps the first MAX_TOKENS tokens;
+#    "max" / "mean" score overlapping MAX_TOKENS windows (WINDOW_STRIDE tokens shared
+#    between neighbours) in one padded batch and pool them per text.
+#    MAX_WINDOWS caps the windows per text (0 = no cap) → one huge text can't turn a
+#    micro-batch into a forward pass that blocks every other request
+MAX_TOKENS = int(os.getenv("MAX_TOKENS", "128"))
+LONG_TEXT_MODE = os.getenv("LONG_TEXT_MODE", "truncate")
+WINDOW_STRIDE = int(os.getenv("WINDOW_STRIDE", "32"))
+MAX_WINDOWS = int(os.getenv("MAX_WINDOWS", "8"))
+
+# 🔹 Exact-match result cache (repeated check-ins skip the model entirely)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+
+# 🔹 Micro-batching (trade a few ms of latency for batched matmuls)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# 🔹 Backpressure: texts allowed to wait for the model; beyond that /predict sheds (503)
+INFERENCE_QUEUE_MAX = int(os.getenv("INFERENCE_QUEUE_MAX", "256"))
+
+# 🔹 Cold start: load + warm-up should fit in this many seconds (readiness probes)
+COLD_START_BUDGET_S = float(os.getenv("COLD_START_BUDGET_S", "20"))
+
+
+class ModelRuntime:
+    """Everything the endpoints need: tokenizer, backend, thresholds, cache, batcher.
+
+    Nothing is loaded at import; `get_runtime()` builds it once, either in the
+    FastAPI startup lifespan or on the first request.
+    """
+
+    def __init__(self):
+        timings = {}
+        start = time.perf_counter()
+
+        def mark(stage):
+            timings[stage] = round(time.perf_counter() - start - sum(timings.values()), 3)
+
+        print("🚀 Loading BERT model & tokenizer...")
+
+        # per-stage timings, batch sizes, queue wait, token lengths
+        self.metrics = ServiceMetrics()
+
+        # per-worker thread budget → workers don't oversubscribe the cores
+        torch.set_num_threads(TORCH_THREADS)
+
+        self.tokenizer = load_tokenizer(MODEL_PATH)   # fast (Rust) tokenizer, checked against the pure-Python one
+        mark("tokenizer_s")
+
+        # before the backend: an int8 export is only used with the thresholds it was checked with
+        with open(THRESHOLDS_PATH) as f:
+            self.thresholds = json.load(f)
+
+        self.backend, self.precision = self._load_backend()
+        mark("model_s")
+        print(f"✅ Serving {self.backend.name} backend ({self.precision})")
+
+        self.long_text_mode = LONG_TEXT_MODE
+        if self.long_text_mode not in ("truncate", "max", "mean"):
+            print(f"⚠️ Unknown LONG_TEXT_MODE={LONG_TEXT_MODE!r}, truncating long texts")
+            self.long_text_mode = "truncate"
+
+        # 🔧 Inference-time improvements (NO TRAINING) → one vectorized pass per batch
+        self.postprocessor = EmotionPostProcessor(
+            self.thresholds,
+            labels=LABELS,
+            top_k=TOP_K,
+            min_confidence=MIN_CONFIDENCE,
+            rare_fallback=RARE_FALLBACK,
+            decimals=3
+        )
+
+        self.cache = PredictionCache(
+            PREDICTION_CACHE_SIZE,
+            normalize=normalize_text,
+            version=(
+                fingerprint_dir(MODEL_PATH), self.backend.name, self.precision,
+                fingerprint_json(self.thresholds), MAX_TOKENS, self.long_text_mode, WINDOW_STRIDE, MAX_WINDOWS
+            )
+        )
+        mark("setup_s")
+
+        # first forward pass pays for lazy kernel/graph init → before readiness
+        self.run_batch(["warm up"])
+        mark("warmup_s")
+        self.metrics = ServiceMetrics()   # warm-up doesn't count
+
+        self.batcher = MicroBatcher(
+            self.run_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            max_queue=INFERENCE_QUEUE_MAX,
+            on_queue_wait=self.metrics.queue_wait_seconds.observe_many
+        )
+
+        timings["total_s"] = round(time.perf_counter() - start, 3)
+        timings["budget_s"] = COLD_START_BUDGET_S
+        timings["backend"] = self.backend.name
+        timings["precision"] = self.precision
+        timings["long_text_mode"] = self.long_text_mode
+        timings["pid"] = os.getpid()
+        timings["torch_threads"] = torch.get_num_threads()
+        self.startup = timings
+
+        if timings["total_s"] > COLD_START_BUDGET_S:
+            print(f"⚠️ Cold start {timings['total_s']:.1f}s is over the {COLD_START_BUDGET_S:.0f}s budget: {timings}")
+        else:
+            print(f"⏱️ Cold start {timings['total_s']:.1f}s")
+
+    def _load_backend(self):
+        precision = MODEL_PRECISION
+
+        if MODEL_BACKEND == "onnx":
+            backend = load_onnx(
+                MODEL_PATH,
+                intra_op_threads=ONNX_INTRA_OP_THREADS or TORCH_THREADS,
+                inter_op_threads=ONNX_INTER_OP_THREADS
+            )
+            if backend is not None:
+                return backend, "fp32"
+
+        model = None
+        if precision == "int8":
+            model = load_int8(
+                BertForSequenceClassification, MODEL_PATH,
+                max_f1_drop=INT8_MAX_F1_DROP, thresholds=self.thresholds
+            )
+        if model is None:
+            precision = "fp32"
+            model = load_shared(BertForSequenceClassification, MODEL_PATH)
+        if model is None:
+            model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
+        model.eval()
+        return TorchBackend(model), precision
+
+    def infer_probs(self, texts):
+        metrics = self.metrics
+
+        # one padded forward pass for the whole list
+        with metrics.stage("tokenize"):
+            if self.long_text_mode == "truncate":
+                inputs = self.tokenizer(
+                    texts,
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=MAX_TOKENS
+                )
+                owner = None
+            else:
+                inputs, owner = encode_windows(
+                    self.tokenizer, texts, max_length=MAX_TOKENS, stride=WINDOW_STRIDE,
+                    max_windows=MAX_WINDOWS
+                )
+        # rows of the forward pass: texts, or their windows
+        metrics.batch_size.observe(len(inputs["attention_mask"]))
+        metrics.input_tokens.observe_many(inputs["attention_mask"].sum(dim=1).tolist())
+
+        with metrics.stage("forward"):
+            probs = torch.sigmoid(self.backend.logits(inputs))  # multi-label → sigmoid
+
+        if owner is not None:
+            # short texts are one window each → returned as-is
+            probs = pool_windows(probs, owner, len(texts), self.long_text_mode)
+        return probs
+
+    def run_batch(self, texts):
+        probs = self.infer_probs(texts)
+
+        with self.metrics.stage("postprocess"):
+            responses = self.postprocessor.respond(probs, texts)
+
+        # meta layer reuses the same probabilities (no second forward pass);
+        # always computed so cached results can serve both response shapes
+        with self.metrics.stage("meta"):
+            metas = map_to_meta_emotion_batch(texts, probs, LABELS, META_EMOTIONS, self.thresholds)
+            for response, result in zip(responses, metas):
+                response["meta"] = meta_response(result)
+        return responses
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = ModelRuntime()
+    return _runtime
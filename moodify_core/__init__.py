@@ -0,0 +1,5 @@
+"""Shared building blocks for the Moodify emotion model.
+
+Used by the model service (`model_service/app.py`) and by the training,
+threshold and evaluation scripts in the repository root.
+"""
@@ -0,0 +1,50 @@
+class TextAnalysis:
+    """One normalized text, tokenized and phrase-matched once for all rules.
+
+    Supports the same queries as `PhraseMatches` (`phrase in a`,
+    `a.any(group)`, `a.in_group(group)`) plus `a.negated(phrase)`.
+    """
+
+    def __init__(self, text, matcher, negations, window=4):
+        self.text = text
+        self.matches = matcher.match(text)
+        self.window = window
+        self._negations = negations
+        self._max_words = matcher.max_words
+        self._negated = None
+
+    def _index_negations(self):
+        tokens = self.text.split()
+        window = self.window
+
+        # negs[i] = negation tokens among tokens[:i]
+        negations = set(self._negations)
+        negs = [0]
+        for tok in tokens:
+            negs.append(negs[-1] + (tok in negations))
+
+        # token n-gram → negated at any occurrence (a negation in the
+        # `window` tokens before it); n-grams up to the longest phrase
+        negated = {}
+        for n in range(1, self._max_words + 1):
+            for i in range(len(tokens) - n + 1):
+                key = tuple(tokens[i:i + n])
+                hit = negs[i] > negs[max(0, i - window)]
+                negated[key] = negated.get(key, False) or hit
+        return negated
+
+    def __contains__(self, phrase):
+        return phrase in self.matches
+
+    def any(self, group):
+        return self.matches.any(group)
+
+    def in_group(self, group):
+        return self.matches.in_group(group)
+
+    def negated(self, phrase):
+        """True if `phrase` occurs as whole tokens with a negation right before it."""
+        # tokenized on first use: only rule-assisted texts ever ask
+        if self._negated is None:
+            self._negated = self._index_negations()
+        return self._negated.get(tuple(phrase.split()), False)
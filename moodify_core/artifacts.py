@@ -0,0 +1,27 @@
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_dir(entry):
+    """Yields a scratch directory that becomes `entry` once the block finishes.
+
+    Files are written next to the entry and the directory is renamed into
+    place, so readers never see half an artifact. If another process
+    renamed its copy first, ours is dropped; on error nothing is left behind.
+    """
+    entry = Path(entry)
+    tmp = entry.parent / f"{entry.name}.tmp{os.getpid()}"
+    tmp.mkdir(parents=True, exist_ok=True)
+    try:
+        yield tmp
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    try:
+        tmp.rename(entry)
+    except OSError:
+        shutil.rmtree(tmp)  # another process won the race
@@ -0,0 +1,58 @@
+import os
+
+import torch
+
+ONNX_FILENAME = "model.onnx"
+
+
+class TorchBackend:
+    """Runs a (possibly int8-quantized) transformers model in PyTorch."""
+
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+
+    def logits(self, inputs):
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class OnnxBackend:
+    """Runs the exported `model.onnx` graph with ONNX Runtime on CPU.
+
+    `intra_op_threads` / `inter_op_threads` of 0 let ONNX Runtime pick.
+    """
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, intra_op_threads=0, inter_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def logits(self, inputs):
+        feed = {name: inputs[name].numpy().astype("int64") for name in self.input_names}
+        return torch.from_numpy(self.session.run(["logits"], feed)[0])
+
+
+def load_onnx(model_path, intra_op_threads=0, inter_op_threads=0):
+    """OnnxBackend for `model_path`, or None when it cannot be used."""
+    onnx_path = os.path.join(model_path, ONNX_FILENAME)
+    if not os.path.exists(onnx_path):
+        print(f"⚠️ No {ONNX_FILENAME} in {model_path} (run export_onnx.py), using torch")
+        return None
+
+    try:
+        return OnnxBackend(onnx_path, intra_op_threads, inter_op_threads)
+    except ImportError:
+        print("⚠️ onnxruntime is not installed, using torch")
+        return None
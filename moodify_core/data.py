@@ -0,0 +1,39 @@
+import torch
+
+
+def length_sorted_batches(lengths, batch_size):
+    """Index batches of similar length (shortest first)."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def predict_logits(model, tokenizer, texts, max_length=128, batch_size=64, log_every=0, encodings=None):
+    """Logits `[N, num_labels]` for `texts`, in their original order.
+
+    Texts are bucketed by token length and each batch is padded only to
+    its longest member, instead of every row to `max_length`. Pass
+    `encodings` (unpadded, e.g. from another model with the same vocab)
+    to skip tokenizing; keys the model doesn't take are dropped.
+    """
+    texts = list(texts)
+    if encodings is None:
+        encodings = tokenizer(texts, truncation=True, max_length=max_length)
+    encodings = {k: v for k, v in encodings.items() if k in tokenizer.model_input_names}
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+
+    logits = None
+    with torch.no_grad():
+        batches = length_sorted_batches(lengths, batch_size)
+        for n, batch in enumerate(batches, 1):
+            features = [{k: v[i] for k, v in encodings.items()} for i in batch]
+            inputs = tokenizer.pad(features, return_tensors="pt")
+
+            out = model(**inputs).logits
+            if logits is None:
+                logits = torch.empty(len(texts), out.shape[1], dtype=out.dtype)
+            logits[batch] = out  # scatter back → original order
+
+            if log_every and n % log_every == 0:
+                print(f"  Processed {n}/{len(batches)} batches...")
+
+    return logits
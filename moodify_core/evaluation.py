@@ -0,0 +1,147 @@
+import numpy as np
+import torch
+
+from moodify_core.data import predict_logits
+from moodify_core.goemotions import load_split
+from moodify_core.labels import NUM_LABELS
+from moodify_core.tokenization import load_tokenizer
+
+# rows per step when scoring precomputed (e.g. memory-mapped) matrices
+CHUNK_SIZE = 4096
+
+
+def multi_hot(label_lists, num_labels=NUM_LABELS):
+    """GoEmotions label-id lists → `[N, num_labels]` int matrix."""
+    out = np.zeros((len(label_lists), num_labels), dtype=np.int64)
+    for i, labs in enumerate(label_lists):
+        out[i, list(labs)] = 1
+    return out
+
+
+def _ratio(num, den):
+    # sklearn's zero_division default: 0/0 → 0.0
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+
+
+class ConfusionCounts:
+    """Per-class TP/FP/FN and exact-match rows, accumulated batch by batch.
+
+    Memory is `O(num_labels)` however many rows go through `update`, and
+    `metrics()` matches sklearn's micro/macro/weighted scores on the full
+    matrices.
+    """
+
+    def __init__(self, num_labels=NUM_LABELS):
+        self.tp = np.zeros(num_labels, dtype=np.int64)
+        self.fp = np.zeros(num_labels, dtype=np.int64)
+        self.fn = np.zeros(num_labels, dtype=np.int64)
+        self.exact = 0
+        self.rows = 0
+
+    def update(self, labels, preds):
+        labels = np.asarray(labels) > 0
+        preds = np.asarray(preds) > 0
+        self.tp += (labels & preds).sum(axis=0)
+        self.fp += (~labels & preds).sum(axis=0)
+        self.fn += (labels & ~preds).sum(axis=0)
+        self.exact += int((labels == preds).all(axis=1).sum())
+        self.rows += len(labels)
+
+    def metrics(self):
+        tp, fp, fn = self.tp, self.fp, self.fn
+        support = tp + fn
+
+        f1 = _ratio(2 * tp, 2 * tp + fp + fn)
+        return {
+            "accuracy": float(_ratio(self.exact, self.rows)),   # exact match (subset accuracy)
+            "f1_micro": float(_ratio(2 * tp.sum(), 2 * tp.sum() + fp.sum() + fn.sum())),
+            "f1_macro": float(f1.mean()),
+            "f1_weighted": float(_ratio((f1 * support).sum(), support.sum())),
+            "precision": float(_ratio(tp.sum(), tp.sum() + fp.sum())),
+            "recall": float(_ratio(tp.sum(), support.sum())),
+        }
+
+
+def evaluate_probs(postprocessor, probs, texts, labels, chunk_size=CHUNK_SIZE, from_logits=False):
+    """Metrics of the inference-time pipeline for precomputed `[N, num_labels]` scores.
+
+    Scored `chunk_size` rows at a time, so memory-mapped inputs are never
+    loaded whole and no `[N, num_labels]` prediction matrix is built.
+    """
+    texts = list(texts)
+    counts = ConfusionCounts(np.shape(labels)[1])
+
+    for start in range(0, len(texts), chunk_size):
+        # copy → writable chunk even when `probs` is a read-only memory map (logits cache)
+        chunk = torch.from_numpy(np.array(probs[start:start + chunk_size], dtype=np.float32))
+        if from_logits:
+            chunk = torch.sigmoid(chunk)
+        preds = postprocessor.predict(chunk, texts[start:start + chunk_size]).numpy()
+        counts.update(labels[start:start + chunk_size], preds)
+
+    return counts.metrics()
+
+
+def evaluate_thresholds(probs, labels, thresholds, chunk_size=CHUNK_SIZE):
+    """Metrics of plain `probs > thresholds` (scalar or per-class vector), chunked."""
+    counts = ConfusionCounts(np.shape(labels)[1])
+    for start in range(0, len(labels), chunk_size):
+        preds = np.asarray(probs[start:start + chunk_size]) > thresholds
+        counts.update(labels[start:start + chunk_size], preds)
+    return counts.metrics()
+
+
+def dataset_batches(dataset, chunk_size=1024):
+    """`(texts, label_lists)` chunks of a GoEmotions-style split (streaming or not)."""
+    for batch in dataset.iter(batch_size=chunk_size):
+        yield batch["text"], batch["labels"]
+
+
+def stream_evaluate(model, tokenizer, postprocessor, batches, max_length=128, batch_size=64):
+    """The inference-time pipeline over `(texts, label_lists)` chunks, in flat memory.
+
+    Only one chunk's logits exist at a time; everything else is per-class
+    counts, so the corpus can be far larger than RAM.
+    """
+    counts = ConfusionCounts(len(postprocessor.labels))
+
+    for texts, label_lists in batches:
+        texts = list(texts)
+        logits = predict_logits(model, tokenizer, texts, max_length=max_length, batch_size=batch_size)
+        preds = postprocessor.predict(torch.sigmoid(logits), texts).numpy()
+        counts.update(multi_hot(label_lists, counts.tp.shape[0]), preds)
+
+    return counts.metrics()
+
+
+def evaluate_pipeline(model, tokenizer, postprocessor, split, max_length=128, batch_size=64):
+    """The inference-time pipeline (thresholds + length penalty + TOP_K) on a prepared split."""
+    data = load_split(split, tokenizer, max_length)
+    logits = predict_logits(
+        model, tokenizer, data.texts, max_length=max_length, batch_size=batch_size, encodings=data.encodings()
+    )
+    return evaluate_probs(postprocessor, logits, data.texts, data.labels, from_logits=True)
+
+
+def run_inference(model_cls, model_path, texts, max_length=128, batch_size=64, threads=0, split=None):
+    """Load `model_path` and return its logits `[N, num_labels]` for `texts`.
+
+    Batched and length-bucketed (`predict_logits`); `threads` > 0 pins torch's
+    intra-op thread count. `split` names the prepared GoEmotions split `texts`
+    came from → its token ids are read from disk instead of tokenizing.
+    """
+    if threads:
+        torch.set_num_threads(threads)
+
+    texts = list(texts)
+    tokenizer = load_tokenizer(model_path)
+    model = model_cls.from_pretrained(model_path)
+    model.eval()
+
+    encodings = None
+    if split is not None:
+        encodings = load_split(split, tokenizer, max_length).encodings()
+
+    return predict_logits(model, tokenizer, texts, max_length=max_length, batch_size=batch_size, encodings=encodings)
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from moodify_core.artifacts import atomic_dir
+from moodify_core.labels import NUM_LABELS
+from moodify_core.tokenization import SAMPLE_TEXTS
+
+# Prepared GoEmotions splits (python prepare_data.py), read back memory-mapped:
+#
+#   <DATA_DIR>/v<FORMAT_VERSION>/<split>/
+#       texts.txt                 UTF-8, NUL-separated
+#       labels.npy                uint8 [N, ceil(NUM_LABELS / 8)], np.packbits per row
+#       meta.json
+#       tokens-<tokenizer>-<max_length>/
+#           input_ids.npy         every row's ids back to back (uint16 if the vocab fits)
+#           offsets.npy           int64 [N + 1], row i = input_ids[offsets[i]:offsets[i + 1]]
+#           meta.json
+#
+# Rows are unpadded (attention mask = all ones, length = offsets diff); padding
+# is left to the batch (predict_logits / DataCollatorWithPadding).
+DATA_DIR = Path(os.getenv(
+    "MOODIFY_DATA_CACHE",
+    Path(__file__).resolve().parent.parent / ".cache" / "goemotions"
+))
+
+DATASET = "go_emotions"
+FORMAT_VERSION = 1
+SEPARATOR = "\0"
+
+
+def tokenizer_fingerprint(tokenizer):
+    """Hash of the vocab and of the ids for SAMPLE_TEXTS (casing, accents, specials).
+
+    Tokenizers that produce the same ids (DistilBERT / BERT-base uncased)
+    share one prepared tokenization.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    h.update(json.dumps(tokenizer(list(SAMPLE_TEXTS))["input_ids"]).encode())
+    return h.hexdigest()[:16]
+
+
+def _split_dir(split):
+    return DATA_DIR / f"v{FORMAT_VERSION}" / split
+
+
+def _write_split(split, entry):
+    from datasets import load_dataset
+
+    print(f"📦 Preparing {DATASET}/{split} → {entry}")
+    data = load_dataset(DATASET, split=split)
+    texts, label_lists = data["text"], data["labels"]
+
+    labels = np.zeros((len(texts), NUM_LABELS), dtype=np.uint8)
+    for i, labs in enumerate(label_lists):
+        labels[i, labs] = 1
+
+    with atomic_dir(entry) as tmp:
+        with open(tmp / "texts.txt", "w", encoding="utf-8") as f:
+            f.write(SEPARATOR.join(texts))
+        np.save(tmp / "labels.npy", np.packbits(labels, axis=1))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"dataset": DATASET, "split": split, "rows": len(texts),
+                       "num_labels": NUM_LABELS, "format_version": FORMAT_VERSION}, f, indent=2)
+
+
+def _write_tokens(texts, tokenizer, fingerprint, max_length, entry):
+    print(f"📦 Tokenizing {len(texts)} texts (max_length={max_length}) → {entry}")
+    ids = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in ids], out=offsets[1:])
+    dtype = np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max + 1 else np.int32
+
+    with atomic_dir(entry) as tmp:
+        np.save(tmp / "input_ids.npy", np.fromiter((i for row in ids for i in row), dtype=dtype, count=offsets[-1]))
+        np.save(tmp / "offsets.npy", offsets)
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"tokenizer": fingerprint, "tokenizer_class": type(tokenizer).__name__,
+                       "max_length": max_length, "rows": len(ids), "format_version": FORMAT_VERSION}, f, indent=2)
+
+
+def prepare_split(split="test", tokenizer=None, max_length=128):
+    """Write `split` (and its tokenization by `tokenizer`) unless already on disk."""
+    entry = _split_dir(split)
+    if not (entry / "meta.json").exists():
+        _write_split(split, entry)
+
+    if tokenizer is None:
+        return entry, None
+
+    fingerprint = tokenizer_fingerprint(tokenizer)
+    tokens = entry / f"tokens-{fingerprint}-{max_length}"
+    if not (tokens / "meta.json").exists():
+        _write_tokens(GoEmotionsSplit(entry).texts, tokenizer, fingerprint, max_length, tokens)
+    return entry, tokens
+
+
+def load_split(split="test", tokenizer=None, max_length=128):
+    """A prepared GoEmotions split, memory-mapped (prepared first if missing).
+
+    With a `tokenizer`, the split also carries its token ids truncated to
+    `max_length`; without one, only texts and labels are loaded.
+    """
+    return GoEmotionsSplit(*prepare_split(split, tokenizer, max_length))
+
+
+class GoEmotionsSplit:
+    """Texts, labels and (optionally) token ids of one prepared split."""
+
+    def __init__(self, path, tokens_path=None):
+        self.path = Path(path)
+        self.tokens_path = Path(tokens_path) if tokens_path else None
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        self._texts = None
+        self._open()
+
+    def _open(self):
+        self._labels = np.load(self.path / "labels.npy", mmap_mode="r")
+        if self.tokens_path:
+            self._ids = np.load(self.tokens_path / "input_ids.npy", mmap_mode="r")
+            self._offsets = np.load(self.tokens_path / "offsets.npy", mmap_mode="r")
+
+    # memory maps don't pickle cheaply → DataLoader workers reopen the files
+    def __getstate__(self):
+        return {"path": self.path, "tokens_path": self.tokens_path, "meta": self.meta, "_texts": None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def texts(self):
+        if self._texts is None:
+            with open(self.path / "texts.txt", encoding="utf-8") as f:
+                self._texts = f.read().split(SEPARATOR)
+        return self._texts
+
+    @property
+    def labels(self):
+        """Multi-hot `[N, NUM_LABELS]` int8 matrix."""
+        return np.unpackbits(self._labels, axis=1, count=self.meta["num_labels"]).astype(np.int8)
+
+    @property
+    def label_lists(self):
+        return [np.flatnonzero(row).tolist() for row in self.labels]
+
+    @property
+    def lengths(self):
+        """Tokens per row (= attention mask length)."""
+        return np.diff(self._offsets)
+
+    def label_row(self, i):
+        return np.unpackbits(self._labels[i], count=self.meta["num_labels"])
+
+    def input_ids(self, i):
+        return self._ids[self._offsets[i]:self._offsets[i + 1]]
+
+    def encodings(self):
+        """Unpadded `{"input_ids", "attention_mask", "token_type_ids"}` rows for predict_logits."""
+        offsets = np.asarray(self._offsets)
+        ids = np.split(np.asarray(self._ids, dtype=np.int64), offsets[1:-1])
+        return {
+            "input_ids": ids,
+            "attention_mask": [np.ones_like(row) for row in ids],
+            "token_type_ids": [np.zeros_like(row) for row in ids],
+        }
+
+    def torch_dataset(self, label_value=1.0):
+        """Dataset for `Trainer` + `DataCollatorWithPadding` (unpadded rows, float labels)."""
+        return TokenizedDataset(self, label_value)
+
+
+class TokenizedDataset(torch.utils.data.Dataset):
+    def __init__(self, split, label_value=1.0):
+        self.split = split
+        self.label_value = label_value
+
+    def __len__(self):
+        return len(self.split)
+
+    def __getitem__(self, i):
+        ids = self.split.input_ids(i).tolist()
+        return {
+            "input_ids": ids,
+            "attention_mask": [1] * len(ids),
+            "labels": (self.split.label_row(i) * self.label_value).tolist(),
+        }
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from moodify_core.artifacts import atomic_dir
+
+CACHE_DIR = Path(os.getenv(
+    "MOODIFY_LOGITS_CACHE",
+    Path(__file__).resolve().parent.parent / ".cache" / "logits"
+))
+
+WEIGHT_FILES = ["model.safetensors", "pytorch_model.bin"]
+TOKENIZER_FILES = ["vocab.txt", "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json"]
+
+
+def hash_files(paths, h=None):
+    h = h or hashlib.sha256()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(model_path, split, max_length):
+    """Weights hash + tokenizer files hash + max_length + dataset split."""
+    weights = hash_files([os.path.join(model_path, f) for f in WEIGHT_FILES])
+    tokenizer = hash_files([os.path.join(model_path, f) for f in TOKENIZER_FILES])
+    return {
+        "weights_sha256": weights,
+        "tokenizer_sha256": tokenizer,
+        "max_length": max_length,
+        "split": split,
+    }
+
+
+def load_or_compute(model_path, split, max_length, compute):
+    """`(logits, labels)` for a model/split, read-only memory-mapped from disk.
+
+    `compute()` must return `(logits, labels)` as `[N, num_labels]` arrays;
+    it only runs (and is then stored) when no matching cache entry exists.
+    """
+    key = cache_key(model_path, split, max_length)
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    entry = CACHE_DIR / digest
+
+    if (entry / "key.json").exists():
+        print(f"⚡ Using cached logits ({entry})")
+    else:
+        logits, labels = compute()
+
+        with atomic_dir(entry) as tmp:
+            np.save(tmp / "logits.npy", np.asarray(logits, dtype=np.float32))
+            np.save(tmp / "labels.npy", np.asarray(labels, dtype=np.int8))
+            with open(tmp / "key.json", "w") as f:
+                json.dump(key, f, indent=2)
+
+    return (
+        np.load(entry / "logits.npy", mmap_mode="r"),
+        np.load(entry / "labels.npy", mmap_mode="r"),
+    )
@@ -0,0 +1,406 @@
+from functools import lru_cache
+
+import numpy as np
+import torch
+
+from moodify_core.analysis import TextAnalysis
+from moodify_core.phrases import PhraseMatcher
+from moodify_core.postprocess import DEFAULT_THRESHOLD
+from moodify_core.text import normalize_text
+
+# 🔹 Meta-emotion layer: 28 GoEmotions scores + text rules → one meta emotion.
+# Import-safe (no model, no I/O); callers pass probabilities they already have.
+
+NEGATIONS = [
+    "not", "n't", "no", "never", "hardly", "barely", 
+    "without", "none", "nothing", "nowhere"
+]
+
+META_EMOTIONS = {
+    "passive_frustration": ["approval", "disappointment", "annoyance", "disapproval"],
+    "positive_excited": ["admiration", "excitement", "joy", "pride"],
+    "negative_strong": ["anger", "disgust", "fear"],
+    "sad_block": ["sadness", "grief", "remorse"],
+    "care_block": ["caring", "love", "gratitude"],
+    "confusion_block": ["confusion", "realization", "curiosity"],
+    "burnout_exhaustion": ["sadness", "disappointment", "annoyance"],
+    "anxiety_block": ["fear", "nervousness"],
+    "calm_relief": ["relief", "joy"],  # SADECE relief + joy (approval/neutral kaldır)
+    "detachment": ["neutral", "disappointment"],
+    "desire_block": ["desire", "curiosity"],
+    "humor_light": ["amusement"],
+    "positive_mild": ["optimism", "approval"]  # yeni grup
+}
+
+ANXIETY_PHRASES_V2 = [
+    "can't stop overthinking", "can't stop thinking", 
+    "mind won't shut up", "thoughts racing", "on edge", 
+    "can't calm", "worried I'll", "what if",
+    "thoughts won't stop", "feel on edge", "won't shut up",
+    "racing", "constantly on edge", "thoughts won't stop racing",
+    "my thoughts", "thoughts won't"  # eklendi - daha geniş eşleşme
+]
+
+# Anxiety patterns - GENİŞLETİLDİ
+ANXIETY_KEYWORDS = ["racing", "on edge", "overthinking", "won't shut up", "can't calm"]
+
+NEGATIVE_OBJECTS = ["it", "this", "everything", "the situation", "my life", "all of that", "my mind", "my thoughts"]
+
+def anxiety_phrase_rule(m):
+    # Romantic/positive → desire
+    if "can't stop thinking" in m and "you" in m:
+        return "desire_block"
+    
+    if m.any("ANXIETY_KEYWORDS"):
+        return "anxiety_block"
+    
+    # Orijinal pattern check
+    if m.any("ANXIETY_PHRASES_V2"):
+        if m.any("NEGATIVE_OBJECTS"):
+            return "anxiety_block"
+    
+    if "can't help" in m:
+        if "wanting" in m or "desire" in m or "wish" in m:
+            return "desire_block"  # CHANGED from "desire"
+    
+    return None
+
+POSITIVE_WORDS = [
+    "smile", "smiling", "happy", "excited", "made my day",
+    "so good", "energized", "buzzing", "omg", "literally"  # added omg, literally
+]
+
+def positive_override(m, probs, labels):
+    for p in m.in_group("POSITIVE_WORDS"):
+        if not m.negated(p):
+            return "positive_excited"
+    return None
+
+CALM_WORDS = ["calm", "peaceful", "relieved", "relief", "breathe", "breathing", "finally breathe", "feel calm"]
+
+CALM_SARCASM_MARKERS = ["whatever", "i guess", "anyway", "go ahead", "i'm done", "just done"]
+
+def calm_rule(m, active):
+    # Önce sarcasm check
+    if m.any("CALM_SARCASM_MARKERS"):
+        return None  # calm değil
+    
+    for c in m.in_group("CALM_WORDS"):
+        if not m.negated(c):
+            # Text-only calm detection (model boşsa)
+            if len(active) == 0 or (len(active) == 1 and "neutral" in active):
+                return "calm_relief"
+            
+            # Model-based calm
+            if active.get("relief", 0) > 0.10 or active.get("joy", 0) > 0.35:
+                return "calm_relief"
+    return None
+
+CARE_WORDS = ["love", "care", "grateful", "appreciate", "mean a lot", "means a lot", "didn't have to"]
+
+def care_rule(m, active):
+    # ÖNCE SARCASM/NEGATION CHECK - GENİŞLETİLDİ
+    # "no worries" with "don't have to" = sarcasm, skip care detection
+    if "no worries" in m and ("don't have to" in m or "you don't have to" in m):
+        return None  # let passive_frustration handle it
+    
+    # "don't have to care" - specific negation
+    if "don't have to care" in m or "you don't have to care" in m:
+        return None  # skip care detection
+    
+    # General "don't have to" check - MOVED AFTER specific checks
+    if "don't have to" in m or "you don't have to" in m:
+        # If it's followed by a care word, skip
+        if m.any("CARE_WORDS"):
+            return None
+    
+    for cw in m.in_group("CARE_WORDS"):
+        if m.negated(cw):
+            return None
+        
+        # care_block koşulu
+        if active.get("gratitude", 0) > 0.15 or active.get("caring", 0) > 0.15:
+            return "care_block"
+        
+        # Text-only care
+        if len(active) <= 1:
+            return "care_block"
+    return None
+
+
+PF_TEXT_PATTERNS = [
+    "i'm not mad",
+    "i am not mad",
+    "i'm not upset",
+    "i'm just tired",
+    "i am just tired",
+    "done explaining myself",
+    "whatever you want",
+    "i don't care anymore",
+    "it's fine i guess",
+]
+
+def passive_frustration_text_rule(m, probs, labels):
+    if not m.any("PF_TEXT_PATTERNS"):
+        return None
+
+    anger = probs[labels.index("anger")].item()
+    sadness = probs[labels.index("sadness")].item()
+    joy = probs[labels.index("joy")].item()
+    neutral = probs[labels.index("neutral")].item()
+
+    if neutral > 0.60:
+        weak = ["annoyance", "disappointment", "disapproval"]
+        if any(probs[labels.index(w)].item() > 0.10 for w in weak):
+            return "passive_frustration"
+    return None
+
+
+
+PF_SARCASM_MARKERS = ["whatever", "i guess", "sure", "obviously", "go ahead", "fine"]
+
+def passive_frustration_rule(m, probs, labels, active):
+    # Sarcasm varsa joy/excitement'a dikkat et
+    if m.any("PF_SARCASM_MARKERS"):
+        # "makes you happy" kontrolü KALDIRILDI - çünkü sarcasm yine de PF
+        # Eğer güçlü positive var ama weak negative de var → PF
+        if active.get("joy", 0) > 0.40 or active.get("excitement", 0) > 0.40:
+            weak = ["annoyance", "disappointment", "disapproval"]
+            if any(active.get(w, 0) > 0.10 for w in weak):
+                return "passive_frustration"
+        
+        # Sadece weak negatives → PF
+        weak = ["annoyance", "disappointment", "disapproval"]
+        if any(active.get(w, 0) > 0.10 for w in weak):
+            return "passive_frustration"
+        
+        # SARCASM VAR AMA ZAYIF EMOTION → YİNE PF (YENİ)
+        if active.get("joy", 0) > 0.30 or active.get("approval", 0) > 0.30:
+            return "passive_frustration"
+    
+    return None
+
+def special_passive_frustration_rule(active, probs, labels):
+    """Weak PF signals via approval + neutral combo"""
+    if active.get("approval", 0) > 0.50 and active.get("neutral", 0) > 0.20:
+        weak = ["annoyance", "disappointment", "disapproval"]
+        if any(active.get(w, 0) > 0.10 for w in weak):
+            return "passive_frustration"
+    return None
+
+
+def surprise_rule(active):
+    if "surprise" in active:
+        # surprise + joy/excitement → positive_excited
+        if active.get("joy", 0) > 0.25 or active.get("excitement", 0) > 0.25:
+            return "positive_excited"
+
+        # surprise + neutral → hafif pozitif
+        if "neutral" in active:
+            return "calm_relief"
+
+        # sadece surprise → hafif pozitif
+        return "calm_relief"
+
+BURNOUT_PHRASES = [
+    "feel numb", "feel empty", "feel drained", "feel exhausted",
+    "feel overwhelmed", "running on empty", "can't anymore",
+    "feel pointless", "it's pointless", "feels pointless",
+    "i'm numb", "nothing affects", "don't feel anything", "just existing",
+    "no energy", "don't have the energy",
+    "feel anything"  # added - catches "don't really feel anything"
+]
+
+def burnout_rule(m, active):
+    if m.any("BURNOUT_PHRASES"):
+        # Eğer sadness/disappointment az da olsa varsa
+        if active.get("sadness", 0) > 0.05 or active.get("disappointment", 0) > 0.05:
+            return "burnout_exhaustion"
+        # Hiç emotion yoksa bile burnout olabilir
+        if len(active) == 0 or active.get("neutral", 0) > 0.30:  # lowered from 0.50
+            return "burnout_exhaustion"
+    return None
+
+DESIRE_WORDS = ["drawn to", "want this", "can't help wanting"]  # new
+
+def desire_rule(m, active):
+    """Detect desire from text patterns"""
+    if m.any("DESIRE_WORDS"):
+        return "desire_block"
+    return None
+
+# Rules that look at single phrases (not whole lists)
+RULE_PHRASES = [
+    "can't stop thinking", "you", "can't help", "wanting", "desire", "wish",
+    "no worries", "don't have to", "you don't have to",
+    "don't have to care", "you don't have to care", "just existing",
+]
+
+# Every phrase list compiled once → one linear pass per text
+RULE_MATCHER = PhraseMatcher({
+    "BURNOUT_PHRASES": BURNOUT_PHRASES,
+    "ANXIETY_PHRASES_V2": ANXIETY_PHRASES_V2,
+    "ANXIETY_KEYWORDS": ANXIETY_KEYWORDS,
+    "NEGATIVE_OBJECTS": NEGATIVE_OBJECTS,
+    "POSITIVE_WORDS": POSITIVE_WORDS,
+    "CALM_WORDS": CALM_WORDS,
+    "CALM_SARCASM_MARKERS": CALM_SARCASM_MARKERS,
+    "CARE_WORDS": CARE_WORDS,
+    "PF_TEXT_PATTERNS": PF_TEXT_PATTERNS,
+    "PF_SARCASM_MARKERS": PF_SARCASM_MARKERS,
+    "DESIRE_WORDS": DESIRE_WORDS,
+    "RULE_PHRASES": RULE_PHRASES,
+})
+
+@lru_cache(maxsize=8)
+def _incidence(labels, groups):
+    incidence = np.zeros((len(labels), len(groups)))
+    for g, group in enumerate(groups):
+        for lbl in group:
+            incidence[labels.index(lbl), g] = 1.0
+    incidence.setflags(write=False)   # shared by every call
+    return incidence
+
+def meta_incidence(labels, meta_map):
+    """`[num_labels, num_meta]` 0/1 matrix: label → meta groups it belongs to.
+
+    Built once per label list / meta groups, then reused by every batch.
+    """
+    return _incidence(tuple(labels), tuple(tuple(group) for group in meta_map.values()))
+
+def map_to_meta_emotion_batch(texts, probs, labels, meta_map, class_thresholds):
+    """`map_to_meta_emotion` for a list of texts and their `[N, num_labels]` scores.
+
+    Active masks and meta-group scores for every row come from one matrix
+    multiply; the per-row rule layers then only look them up.
+    """
+    probs = torch.as_tensor(probs)
+    p = probs.double().numpy()
+    metas = list(meta_map)
+
+    # 1. ACTIVE emotions (labels missing from the thresholds file → same default as the post-processor)
+    thresholds = np.array([class_thresholds.get(lbl, DEFAULT_THRESHOLD) for lbl in labels])
+    active_mask = p > thresholds
+    active_p = np.where(active_mask, p, 0.0)
+
+    # meta group score = sum of its active labels
+    meta_scores = active_p @ meta_incidence(labels, meta_map)
+    best_meta = meta_scores.argmax(axis=1)
+
+    # 2. MODEL CONFIDENCE
+    max_prob = p.max(axis=1)
+
+    results = []
+    for i, text in enumerate(texts):
+        active = {labels[j]: float(p[i, j]) for j in np.flatnonzero(active_mask[i])}
+        scores = dict(zip(metas, meta_scores[i].tolist()))
+
+        # normalize + match every phrase list once; shared by all rules
+        m = TextAnalysis(normalize_text(text), RULE_MATCHER, NEGATIONS)
+
+        results.append(_decide_meta(
+            m, probs[i], labels, meta_map, active, scores,
+            metas[best_meta[i]], max_prob[i] > 0.70  # 0.75 → 0.70 düşürüldü
+        ))
+    return results
+
+def map_to_meta_emotion(text, probs, labels, meta_map, class_thresholds):
+    return map_to_meta_emotion_batch(
+        [text], torch.as_tensor(probs)[None], labels, meta_map, class_thresholds
+    )[0]
+
+def _decide_meta(m, probs, labels, meta_map, active, meta_scores, best_meta, is_confident):
+    # ============================================
+    # LAYER 1: CRITICAL TEXT PATTERNS
+    # ============================================
+    # Burnout
+    burnout = burnout_rule(m, active)
+    if burnout:
+        if "just existing" in m:  # always burnout
+            return burnout, active, {}
+        if not is_confident or active.get("sadness", 0) > 0.20:
+            return burnout, active, {}
+    
+    # Anxiety
+    anxiety = anxiety_phrase_rule(m)
+    if anxiety and (not is_confident or active.get("fear", 0) > 0.40):
+        return anxiety, active, {}
+    
+    # ============================================
+    # LAYER 2: MODEL-DOMINANT
+    # ============================================
+    if is_confident:
+        # CARE OVERRIDE (YENİ)
+        care_signals = active.get("gratitude", 0) + active.get("caring", 0) + active.get("love", 0)
+        if care_signals > 0.50:
+            return "care_block", active, meta_scores
+        
+        # Admiration + care text
+        if active.get("admiration", 0) > 0.70 and m.any("CARE_WORDS"):
+            return "care_block", active, meta_scores
+        
+        # Fear priority
+        if active.get("fear", 0) > 0.70:
+            if active.get("nervousness", 0) > 0.30:
+                return "anxiety_block", active, meta_scores
+            return "negative_strong", active, meta_scores
+        
+        # Surprise
+        if "surprise" in active and active["surprise"] > 0.70:
+            if active.get("joy", 0) > 0.25 or active.get("excitement", 0) > 0.25:
+                return "positive_excited", active, meta_scores
+            return "calm_relief", active, meta_scores
+        
+        return best_meta, active, meta_scores
+    
+    # ============================================
+    # LAYER 3: RULE-ASSISTED
+    # ============================================
+    pf = passive_frustration_text_rule(m, probs, labels)
+    if pf:
+        return pf, active, {}
+    
+    pf_special = passive_frustration_rule(m, probs, labels, active)
+    if pf_special:
+        return pf_special, active, {}
+    
+    pos = positive_override(m, probs, labels)
+    if pos:
+        return pos, active, {}
+    
+    des = desire_rule(m, active)
+    if des:
+        return des, active, {}
+    
+    care = care_rule(m, active)
+    if care:
+        return care, active, {}
+    
+    calm = calm_rule(m, active)
+    if calm:
+        return calm, active, {}
+    
+    # ============================================
+    # LAYER 4: FALLBACK
+    # ============================================
+    if list(active.keys()) == ["neutral"]:
+        return "neutral", active, {}
+    
+    if len(active) == 1:
+        single = next(iter(active.keys()))
+        for meta, group in meta_map.items():
+            if single in group:
+                return meta, active, {}
+    
+    if len(active) == 0:
+        return "neutral", {}, {}
+    
+    return best_meta, active, meta_scores
+
+def meta_response(result, decimals=3):
+    """`(meta, active, meta_scores)` → JSON-friendly response field."""
+    meta, active, meta_scores = result
+    return {
+        "emotion": meta,
+        "scores": {k: round(v, decimals) for k, v in meta_scores.items() if v > 0}
+    }
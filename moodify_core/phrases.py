@@ -0,0 +1,89 @@
+from collections import deque
+
+
+class PhraseMatches:
+    """Every phrase found in one text, plus the phrase lists they belong to."""
+
+    __slots__ = ("phrases", "groups", "_index")
+
+    def __init__(self, phrases, groups, index):
+        self.phrases = phrases
+        self.groups = groups
+        self._index = index
+
+    def __contains__(self, phrase):
+        return phrase in self.phrases
+
+    def any(self, group):
+        return group in self.groups
+
+    def in_group(self, group):
+        """Matched phrases of `group`, in the order of the original list."""
+        found = [p for p in self.phrases if group in self._index[p]]
+        return sorted(found, key=lambda p: self._index[p][group])
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over several named phrase lists.
+
+    Built once; `match(text)` then reports every (possibly overlapping)
+    substring occurrence in a single pass over the text, so the cost per
+    text does not grow with the number of phrases. Matching is
+    case-sensitive plain substring search, like `phrase in text`.
+    """
+
+    def __init__(self, groups):
+        # phrase → {group: position in that group's list}
+        self._index = {}
+        for group, phrases in groups.items():
+            for pos, phrase in enumerate(phrases):
+                self._index.setdefault(phrase, {}).setdefault(group, pos)
+        # longest phrase in whitespace tokens
+        self.max_words = max((len(p.split()) for p in self._index), default=0)
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for phrase in self._index:
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (phrase,)
+
+        # failure links, breadth first
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def match(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+
+        groups = set()
+        for phrase in found:
+            groups.update(self._index[phrase])
+
+        return PhraseMatches(frozenset(found), frozenset(groups), self._index)
@@ -0,0 +1,112 @@
+import torch
+
+from moodify_core.labels import LABELS
+
+# 🔧 Inference-time improvements (NO TRAINING)
+TOP_K = 3
+MIN_CONFIDENCE = 0.15
+DEFAULT_THRESHOLD = 0.3
+
+# short texts (< 4 words) need a bit more confidence
+SHORT_TEXT_WORDS = 4
+SHORT_TEXT_PENALTY = 0.05
+
+RARE_FALLBACK = {
+    "grief": "sadness",
+    "relief": "neutral",
+    "realization": "neutral"
+}
+
+
+class EmotionPostProcessor:
+    """Thresholding and top-k selection over `[batch, num_labels]` sigmoid scores.
+
+    Per-class thresholds are turned into one vector at construction time,
+    so a whole probability matrix is filtered with a handful of tensor ops
+    instead of a Python loop per label. `decimals` rounds scores before
+    comparing them (the service compares scores rounded to 3 decimals).
+    """
+
+    def __init__(
+        self,
+        thresholds,
+        labels=LABELS,
+        top_k=TOP_K,
+        min_confidence=MIN_CONFIDENCE,
+        rare_fallback=RARE_FALLBACK,
+        decimals=None
+    ):
+        self.labels = list(labels)
+        self.top_k = min(top_k, len(self.labels))
+        self.min_confidence = min_confidence
+        self.rare_fallback = rare_fallback
+        self.decimals = decimals
+
+        self.thresholds = torch.tensor(
+            [thresholds.get(label, DEFAULT_THRESHOLD) for label in self.labels],
+            dtype=torch.float64
+        )
+
+    def length_penalty(self, texts):
+        return torch.tensor(
+            [SHORT_TEXT_PENALTY if len(t.split()) < SHORT_TEXT_WORDS else 0.0 for t in texts],
+            dtype=torch.float64
+        )
+
+    def select(self, probs, texts):
+        """Top-k labels above threshold for every row.
+
+        Returns `(scores, indices, valid)`, each `[batch, top_k]` and sorted
+        best first; `valid` is False where fewer than `top_k` labels passed.
+        """
+        probs = torch.as_tensor(probs).to(torch.float64)
+        if probs.dim() == 1:
+            probs = probs.unsqueeze(0)
+
+        scores = probs
+        if self.decimals is not None:
+            scores = torch.round(probs, decimals=self.decimals)
+
+        limits = self.thresholds.unsqueeze(0) + self.length_penalty(texts).unsqueeze(1)
+        keep = (scores >= limits) & (scores >= self.min_confidence)
+
+        # stable sort → ties keep label order, same as the old list.sort()
+        masked = scores.masked_fill(~keep, float("-inf"))
+        top_scores, top_idx = masked.sort(dim=1, descending=True, stable=True)
+        top_scores = top_scores[:, :self.top_k]
+        top_idx = top_idx[:, :self.top_k]
+
+        return top_scores, top_idx, torch.isfinite(top_scores)
+
+    def predict(self, probs, texts):
+        """Multi-hot `[batch, num_labels]` int matrix of the selected labels."""
+        _, top_idx, valid = self.select(probs, texts)
+
+        preds = torch.zeros(top_idx.shape[0], len(self.labels), dtype=torch.int64)
+        preds.scatter_(1, top_idx, valid.to(torch.int64))
+        return preds
+
+    def respond(self, probs, texts):
+        """`{"emotions", "primaryEmotion"}` response dict for every row."""
+        top_scores, top_idx, valid = self.select(probs, texts)
+
+        results = []
+        for scores, indices, oks in zip(top_scores.tolist(), top_idx.tolist(), valid.tolist()):
+            emotions = [
+                {"name": self.labels[i], "score": round(score, 3)}
+                for score, i, ok in zip(scores, indices, oks)
+                if ok
+            ]
+
+            if emotions:
+                primary = emotions[0]["name"]
+                primary = self.rare_fallback.get(primary, primary)
+            else:
+                primary = "neutral"
+
+            results.append({
+                "emotions": emotions,
+                "primaryEmotion": primary
+            })
+
+        return results
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+import torch
+import transformers
+from transformers import AutoConfig
+
+from moodify_core.logits_cache import WEIGHT_FILES, hash_files
+
+INT8_FILENAME = "model_int8.pt"
+INT8_META_FILENAME = "quantization.json"
+
+
+def quantize_dynamic_int8(model):
+    """int8 dynamic quantization of every nn.Linear (weights int8, activations fp32)."""
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def weights_stat(model_path):
+    """Names, sizes and mtimes of the fp32 weight files (cheap, no reading)."""
+    paths = [os.path.join(model_path, f) for f in WEIGHT_FILES]
+    return [[os.path.basename(p), os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths if os.path.exists(p)]
+
+
+def thresholds_sha256(thresholds):
+    return hashlib.sha256(json.dumps(thresholds, sort_keys=True).encode()).hexdigest()
+
+
+def source_hashes(model_path, thresholds):
+    """Fingerprints of the fp32 weights and of the thresholds an export was checked with."""
+    return {
+        "weights_stat": weights_stat(model_path),
+        "weights_sha256": hash_files([os.path.join(model_path, f) for f in WEIGHT_FILES]),
+        "thresholds_sha256": thresholds_sha256(thresholds),
+    }
+
+
+def _same_weights(meta, model_path):
+    # unchanged size + mtime → same file; only copied / touched weights pay for the SHA-256
+    if meta.get("weights_stat") == weights_stat(model_path):
+        return True
+    return meta.get("weights_sha256") == hash_files([os.path.join(model_path, f) for f in WEIGHT_FILES])
+
+
+def save_int8(qmodel, model_path, meta):
+    """Stores the quantized state dict next to the fp32 weights (no pickled classes)."""
+    torch.save(qmodel.state_dict(), os.path.join(model_path, INT8_FILENAME))
+    with open(os.path.join(model_path, INT8_META_FILENAME), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_int8(model_cls, model_path, max_f1_drop, thresholds):
+    """Pre-quantized `model_cls` from `model_path`, or None when it must not be used.
+
+    Refuses (returns None) when the export is missing, was made with a
+    different torch / transformers version, from other fp32 weights or
+    against other `thresholds` than the ones served now (e.g. after
+    retraining), its recorded micro-F1 drop on the GoEmotions test split
+    exceeds `max_f1_drop`, or its state dict no longer fits the model.
+    """
+    meta_path = os.path.join(model_path, INT8_META_FILENAME)
+    weights_path = os.path.join(model_path, INT8_FILENAME)
+
+    if not (os.path.exists(meta_path) and os.path.exists(weights_path)):
+        print(f"⚠️ No int8 export in {model_path} (run quantize_model.py), using fp32")
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    for lib in (torch, transformers):
+        made_with = meta.get(f"{lib.__name__}_version")
+        if made_with != lib.__version__:
+            print(f"⚠️ int8 export was made with {lib.__name__} {made_with}, running {lib.__version__}; using fp32")
+            return None
+
+    if not _same_weights(meta, model_path):
+        print("⚠️ int8 export doesn't match the current fp32 weights (re-run quantize_model.py), using fp32")
+        return None
+    if meta.get("thresholds_sha256") != thresholds_sha256(thresholds):
+        print("⚠️ int8 export doesn't match the current thresholds (re-run quantize_model.py), using fp32")
+        return None
+
+    drop = meta["f1_micro_fp32"] - meta["f1_micro_int8"]
+    if drop > max_f1_drop:
+        print(f"⚠️ int8 micro-F1 drop {drop:.4f} > allowed {max_f1_drop:.4f}, using fp32")
+        return None
+
+    # same modules as at export time, then the checked int8 weights on top
+    try:
+        qmodel = quantize_dynamic_int8(model_cls(AutoConfig.from_pretrained(model_path)))
+        qmodel.load_state_dict(torch.load(weights_path, weights_only=True))
+    except Exception as e:
+        print(f"⚠️ int8 export could not be loaded ({type(e).__name__}: {e}), using fp32")
+        return None
+    qmodel.eval()
+    return qmodel
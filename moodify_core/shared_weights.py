@@ -0,0 +1,65 @@
+import json
+import mmap
+import os
+import struct
+
+import torch
+from transformers import AutoConfig
+
+SAFETENSORS_FILENAME = "model.safetensors"
+
+DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+
+def mmap_state_dict(path):
+    """State dict whose tensors point straight into a copy-on-write mapping of `path`.
+
+    Pages come from the OS page cache, so every process mapping the same file
+    shares one physical copy of the weights (until a process writes to one).
+    """
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    base = 8 + header_len
+    state = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        if count:
+            tensor = torch.frombuffer(buf, dtype=dtype, count=count, offset=base + begin)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        state[name] = tensor.reshape(info["shape"])
+    return state
+
+
+def load_shared(model_cls, model_path):
+    """`model_cls` with weights memory-mapped from `model.safetensors`, or None.
+
+    Returns None (caller falls back to `from_pretrained`) when there is no
+    safetensors file or its keys don't cover the model.
+    """
+    path = os.path.join(model_path, SAFETENSORS_FILENAME)
+    if not os.path.exists(path):
+        print(f"⚠️ No {SAFETENSORS_FILENAME} in {model_path}, weights won't be shared")
+        return None
+
+    config = AutoConfig.from_pretrained(model_path)
+    model = model_cls(config)   # initial weights are dropped by assign=True below
+
+    missing, unexpected = model.load_state_dict(mmap_state_dict(path), strict=False, assign=True)
+    if missing:
+        print(f"⚠️ {SAFETENSORS_FILENAME} is missing {len(missing)} weights (e.g. {missing[0]}), weights won't be shared")
+        return None
+
+    model.eval()
+    return model
@@ -0,0 +1,5 @@
+import unicodedata
+
+
+def normalize_text(s):
+    return unicodedata.normalize("NFKD", s).replace("’", "'").lower()
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def best_thresholds_per_class(probs, labels, bounds=None, fallback=0.3):
+    """Exact F1-optimal threshold for every column of `probs` in one NumPy pass.
+
+    Each column is sorted once; TP/FP/FN for every possible cut point come
+    from cumulative sums, so no threshold grid is needed. Predictions are
+    `probs > threshold` (as in the threshold scripts) and the returned
+    threshold is the midpoint of the best gap between two sorted scores.
+    `bounds=(lo, hi)` restricts thresholds to that range; columns without
+    any positive F1 get `fallback`.
+
+    Returns `(thresholds, f1)`, both shape `[num_classes]`.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    labels = np.asarray(labels) > 0
+    n, num_classes = probs.shape
+    cols = np.arange(num_classes)
+
+    order = np.argsort(-probs, axis=0, kind="stable")
+    p_sorted = np.take_along_axis(probs, order, axis=0)
+    y_sorted = np.take_along_axis(labels, order, axis=0)
+
+    # cut k → the top k+1 scores of the column are predicted positive
+    tp = np.cumsum(y_sorted, axis=0)
+    predicted = np.arange(1, n + 1)[:, None]
+    positives = labels.sum(axis=0)[None, :]
+    f1 = 2 * tp / (predicted + positives)  # 2TP / (2TP + FP + FN)
+
+    # score just below each cut (last cut: everything is predicted, nothing below)
+    p_next = np.empty_like(p_sorted)
+    p_next[:-1] = p_sorted[1:]
+    p_next[-1] = -np.inf
+
+    # tied scores can't be split by a threshold
+    valid = p_sorted > p_next
+    mid = (p_sorted + p_next) / 2
+    mid[-1] = np.nextafter(p_sorted[-1], -np.inf)
+    # neighbouring floats can round the midpoint up onto the cut score →
+    # use the lower score itself (`probs > threshold` still splits there)
+    mid = np.where(mid < p_sorted, mid, p_next)
+
+    if bounds is not None:
+        lo, hi = bounds
+        valid &= (p_sorted > lo) & (p_next <= hi)
+        mid = np.clip(mid, lo, hi)
+
+    f1 = np.where(valid, f1, -1.0)
+    best = f1.argmax(axis=0)
+    best_f1 = f1[best, cols]
+
+    thresholds = np.where(best_f1 > 0, mid[best, cols], fallback)
+    return thresholds, np.maximum(best_f1, 0.0)
+
+
+def best_global_threshold(probs, labels, bounds=None, fallback=0.3):
+    """Exact micro-F1-optimal single threshold shared by every class.
+
+    Micro-F1 pools TP/FP/FN over all cells, so this is the per-class
+    search on the flattened matrix. Returns `(threshold, micro_f1)`.
+    """
+    probs = np.asarray(probs).reshape(-1, 1)
+    labels = np.asarray(labels).reshape(-1, 1)
+    thresholds, f1 = best_thresholds_per_class(probs, labels, bounds=bounds, fallback=fallback)
+    return float(thresholds[0]), float(f1[0])
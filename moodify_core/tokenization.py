@@ -0,0 +1,65 @@
+from transformers import AutoConfig, BertTokenizerFast, DistilBertTokenizerFast
+
+# transformers 5: BertTokenizer *is* the Rust tokenizer, the pure-Python WordPiece
+# lives on as BertTokenizerLegacy; transformers 4: BertTokenizer is the Python one
+try:
+    from transformers.models.bert.tokenization_bert_legacy import BertTokenizerLegacy as PythonBertTokenizer
+except ImportError:
+    from transformers import BertTokenizer as PythonBertTokenizer
+
+# model_type → (fast Rust tokenizer, pure-Python reference tokenizer)
+# (DistilBERT tokenizes exactly like BERT; casing comes from tokenizer_config.json)
+TOKENIZER_CLASSES = {
+    "bert": (BertTokenizerFast, PythonBertTokenizer),
+    "distilbert": (DistilBertTokenizerFast, PythonBertTokenizer),
+}
+
+# short check-ins, punctuation, curly quotes, accents, emoji, long text
+SAMPLE_TEXTS = [
+    "I'm so happy right now!",
+    "I’m not mad, I’m just tired of explaining myself.",
+    "OMG you actually did it! This is insane!",
+    "I'm confused… did I misunderstand something?",
+    "Wait—what just happened?",
+    "Café naïve résumé — déjà vu.",
+    "I can't stop smiling 😊😊",
+    "ok",
+    "",
+    "I feel drained every single day and I don't have the energy to fight "
+    "anymore, everything feels pointless and I'm just existing at this point.",
+]
+
+
+def load_tokenizer(model_path, verify=True, sample_texts=SAMPLE_TEXTS):
+    """Fast tokenizer built from the `vocab.txt` in `model_path`.
+
+    With `verify=True` the token ids for `sample_texts` are compared with
+    the pure-Python tokenizer once at load time and a mismatch raises
+    ValueError, so swapping tokenizers can never silently change model inputs.
+    If this transformers version has no pure-Python reference, the check is
+    skipped with a warning.
+    """
+    model_type = AutoConfig.from_pretrained(model_path).model_type
+    if model_type not in TOKENIZER_CLASSES:
+        raise ValueError(f"No tokenizer registered for model_type={model_type!r}")
+
+    fast_cls, slow_cls = TOKENIZER_CLASSES[model_type]
+    tokenizer = fast_cls.from_pretrained(model_path)
+
+    slow = slow_cls.from_pretrained(model_path) if verify else None
+    if slow is not None and slow.is_fast:
+        print(f"⚠️ {slow_cls.__name__} is a fast tokenizer here, token ids are not verified")
+        slow = None
+
+    if slow is not None:
+        fast_ids = tokenizer(list(sample_texts), truncation=True, max_length=128)["input_ids"]
+        slow_ids = slow(list(sample_texts), truncation=True, max_length=128)["input_ids"]
+
+        for text, f_ids, s_ids in zip(sample_texts, fast_ids, slow_ids):
+            if f_ids != s_ids:
+                raise ValueError(
+                    f"Fast tokenizer disagrees with {slow_cls.__name__} on {text!r}: "
+                    f"{f_ids} != {s_ids}"
+                )
+
+    return tokenizer
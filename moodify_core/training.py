@@ -0,0 +1,65 @@
+import time
+
+from transformers import TrainerCallback
+
+# /proc/cpuinfo flags of CPUs with native bf16 math (x86 AVX512-BF16 / AMX, Arm BF16)
+BF16_CPU_FLAGS = {"avx512_bf16", "amx_bf16", "bf16"}
+
+
+def cpu_supports_bf16():
+    """True if this CPU does bf16 in hardware; emulated bf16 autocast is slower than fp32."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    return bool(BF16_CPU_FLAGS & set(line.split(":", 1)[1].split()))
+    except OSError:
+        pass
+    return False
+
+
+class ThroughputCallback(TrainerCallback):
+    """Training samples/s and tokens/s between two log steps.
+
+    The trainer reports every training micro-batch with `observe(inputs)`
+    (from `compute_loss`, main process); rates are printed and added to the
+    logs at every `logging_steps`. Evaluation time is not counted.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.samples = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.start = time.perf_counter()
+
+    def observe(self, inputs):
+        mask = inputs["attention_mask"]
+        self.samples += mask.shape[0]
+        self.tokens += int(mask.sum())
+        self.padded_tokens += mask.numel()
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._reset()
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        self._reset()
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if not self.samples:
+            return
+        elapsed = time.perf_counter() - self.start
+        rates = {
+            "samples_per_s": round(self.samples / elapsed, 2),
+            "tokens_per_s": round(self.tokens / elapsed, 1),
+            "padding": round(1 - self.tokens / self.padded_tokens, 3),
+        }
+        if logs is not None:
+            logs.update(rates)
+        print(
+            f"⏱️ step {state.global_step}: {rates['samples_per_s']} samples/s, "
+            f"{rates['tokens_per_s']:.0f} tokens/s ({rates['padding']:.0%} padding)"
+        )
+        self._reset()
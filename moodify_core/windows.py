@@ -0,0 +1,49 @@
+import torch
+
+POOLING = ("max", "mean")
+
+
+def encode_windows(tokenizer, texts, max_length=128, stride=32, max_windows=0):
+    """Tokenize `texts` into overlapping `max_length`-token windows, one padded batch.
+
+    Texts that fit get exactly one window (same encoding as plain truncation);
+    longer ones continue in windows that repeat the last `stride` tokens of
+    the previous one, so the number of windows grows linearly with length.
+    `max_windows > 0` keeps only the first `max_windows` windows of each text
+    (the rest of the text is dropped, like plain truncation does).
+    Returns `(inputs, owner)` where `owner[w]` is the text index of window `w`.
+    """
+    inputs = tokenizer(
+        texts,
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+        max_length=max_length,
+        stride=stride,
+        return_overflowing_tokens=True
+    )
+    owner = inputs.pop("overflow_to_sample_mapping")
+
+    if max_windows and len(owner) > len(texts):
+        # windows of a text are contiguous → rank = position - first window of its text
+        rank = torch.arange(len(owner)) - torch.searchsorted(owner, owner)
+        keep = rank < max_windows
+        if not keep.all():
+            inputs = {k: v[keep] for k, v in inputs.items()}
+            owner = owner[keep]
+    return inputs, owner
+
+
+def pool_windows(probs, owner, num_texts, pooling="max"):
+    """`[num_windows, C]` window scores → `[num_texts, C]` by max or mean per text."""
+    if pooling not in POOLING:
+        raise ValueError(f"pooling must be one of {POOLING}, got {pooling!r}")
+
+    # short-text fast path: one window per text, already in order
+    if len(owner) == num_texts:
+        return probs
+
+    out = torch.zeros(num_texts, probs.shape[1], dtype=probs.dtype)
+    reduce = "amax" if pooling == "max" else "mean"
+    index = owner[:, None].expand_as(probs)
+    return out.scatter_reduce_(0, index, probs, reduce, include_self=False)
@@ -1,25 +1,17 @@
 import numpy as np
-import torch
-from datasets import load_dataset
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
-from sklearn.metrics import f1_score, accuracy_score, precision_score, recall_score
+from transformers import DistilBertForSequenceClassification
 import matplotlib.pyplot as plt
 import seaborn as sns
 import json
 
-print("="*60)
-print("🔍 STEP 1: Loading Model and Dataset")
-print("="*60)
+from moodify_core.data import predict_logits
+from moodify_core.evaluation import evaluate_thresholds
+from moodify_core.goemotions import load_split
+from moodify_core.logits_cache import load_or_compute
+from moodify_core.thresholds import best_global_threshold, best_thresholds_per_class
+from moodify_core.tokenization import load_tokenizer
 
-# Load model and tokenizer
 model_path = "./model"
-tokenizer = DistilBertTokenizer.from_pretrained(model_path)
-model = DistilBertForSequenceClassification.from_pretrained(model_path)
-model.eval()
-
-# Load dataset
-dataset = load_dataset("go_emotions")
-test = dataset["test"]
 
 # Labels
 labels = [
@@ -31,54 +23,47 @@ labels = [
 ]
 num_labels = len(labels)
 
-print(f"✓ Model loaded from {model_path}")
-print(f"✓ Test dataset: {len(test)} samples")
-print(f"✓ Number of emotion classes: {num_labels}")
 
-# Tokenize test set
-print("\n" + "="*60)
-print("🔍 STEP 2: Tokenizing Test Data")
-print("="*60)
+def run_model():
+    # STEPS 1-3 only run when the logits are not cached on disk yet
+    print("="*60)
+    print("🔍 STEP 1: Loading Model and Dataset")
+    print("="*60)
 
-def tokenize(batch):
-    return tokenizer(
-        batch["text"],
-        truncation=True,
-        padding="max_length",
-        max_length=128
-    )
+    # Load model and tokenizer
+    tokenizer = load_tokenizer(model_path)
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
 
-test_enc = test.map(tokenize, batched=True)
-input_ids = torch.tensor(test_enc["input_ids"])
-attention_mask = torch.tensor(test_enc["attention_mask"])
+    # Load dataset (prepared token ids, memory-mapped)
+    test = load_split("test", tokenizer, max_length=128)
 
-# Prepare true labels
-true_labels = np.zeros((len(test), num_labels))
-for i, labs in enumerate(test["labels"]):
-    for l in labs:
-        true_labels[i, l] = 1.0
+    print(f"✓ Model loaded from {model_path}")
+    print(f"✓ Test dataset: {len(test)} samples")
+    print(f"✓ Number of emotion classes: {num_labels}")
 
-print("✓ Tokenization complete")
+    # Prepare labels (bit-packed on disk → multi-hot)
+    print("\n" + "="*60)
+    print("🔍 STEP 2: Preparing Test Labels")
+    print("="*60)
 
-# Get model predictions (logits)
-print("\n" + "="*60)
-print("🔍 STEP 3: Getting Model Predictions")
-print("="*60)
+    true_labels = test.labels
+    print("✓ Labels ready")
 
-with torch.no_grad():
-    logits = []
-    batch_size = 32
-    for i in range(0, len(test), batch_size):
-        out = model(
-            input_ids[i:i+batch_size],
-            attention_mask=attention_mask[i:i+batch_size]
-        )
-        logits.append(out.logits)
-        if (i // batch_size + 1) % 50 == 0:
-            print(f"  Processed {i+batch_size}/{len(test)} samples...")
-    
-    logits = torch.cat(logits).cpu()
-    probs = torch.sigmoid(logits).numpy()
+    # Get model predictions (logits)
+    print("\n" + "="*60)
+    print("🔍 STEP 3: Getting Model Predictions")
+    print("="*60)
+
+    # length-bucketed batches, each padded only to its longest text
+    logits = predict_logits(
+        model, tokenizer, test.texts, max_length=128, batch_size=32, log_every=50, encodings=test.encodings()
+    )
+    return logits.numpy(), true_labels
+
+
+logits, true_labels = load_or_compute(model_path, "go_emotions/test", 128, run_model)
+probs = 1 / (1 + np.exp(-logits))  # sigmoid
 
 print("✓ Predictions obtained")
 
@@ -87,48 +72,24 @@ print("\n" + "="*60)
 print("🔍 STEP 4: Optimizing Global Threshold")
 print("="*60)
 
-thresholds = np.arange(0.05, 0.55, 0.05)
-best_global_f1 = -1
-best_global_t = 0.5
-
-print("\nTesting global thresholds:")
-for t in thresholds:
-    preds = (probs > t).astype(int)
-    f1 = f1_score(true_labels, preds, average="micro")
-    print(f"  Threshold {t:.2f} → F1 = {f1:.4f}")
-    
-    if f1 > best_global_f1:
-        best_global_f1 = f1
-        best_global_t = t
+# exact search over every cut point in [0.05, 0.50]
+best_global_t, best_global_f1 = best_global_threshold(probs, true_labels, bounds=(0.05, 0.50), fallback=0.5)
 
-print(f"\n✓ Best global threshold = {best_global_t:.2f} with F1 = {best_global_f1:.4f}")
+print(f"\n✓ Best global threshold = {best_global_t:.4f} with F1 = {best_global_f1:.4f}")
 
 # OPTIMIZATION 2: Per-class thresholds
 print("\n" + "="*60)
 print("🔍 STEP 5: Optimizing Per-Class Thresholds")
 print("="*60)
 
-candidate_thresholds = np.arange(0.05, 0.51, 0.05)
+# exact F1-optimal cut per class in [0.05, 0.50], all 28 columns at once
+class_t, class_f1 = best_thresholds_per_class(probs, true_labels, bounds=(0.05, 0.50), fallback=0.3)
 best_thresholds = {}
 
 print("\nOptimizing threshold for each emotion:")
 for idx, label in enumerate(labels):
-    best_f1 = 0
-    best_t = 0.3
-
-    y_true = true_labels[:, idx]
-    y_prob = probs[:, idx]
-
-    for t in candidate_thresholds:
-        y_pred = (y_prob > t).astype(int)
-        f1 = f1_score(y_true, y_pred, zero_division=0)
-
-        if f1 > best_f1:
-            best_f1 = f1
-            best_t = t
-
-    best_thresholds[label] = best_t
-    print(f"  {label:15s}  best_t = {best_t:.2f}   f1 = {best_f1:.4f}")
+    best_thresholds[label] = float(class_t[idx])
+    print(f"  {label:15s}  best_t = {class_t[idx]:.4f}   f1 = {class_f1[idx]:.4f}")
 
 print("\n✓ Per-class thresholds optimized")
 
@@ -146,29 +107,21 @@ print("\n" + "="*60)
 print("🔍 STEP 6: Final Evaluation with Optimized Thresholds")
 print("="*60)
 
+# chunked confusion counts → no [N, 28] prediction matrices
+def threshold_scores(thresholds):
+    m = evaluate_thresholds(probs, true_labels, thresholds)
+    return m["f1_micro"], m["accuracy"], m["precision"], m["recall"]
+
 # Method 1: Default threshold (0.5)
-preds_default = (probs > 0.5).astype(int)
-f1_default = f1_score(true_labels, preds_default, average="micro")
-acc_default = accuracy_score(true_labels, preds_default)
-prec_default = precision_score(true_labels, preds_default, average="micro")
-rec_default = recall_score(true_labels, preds_default, average="micro")
+f1_default, acc_default, prec_default, rec_default = threshold_scores(0.5)
 
 # Method 2: Optimized global threshold
-preds_global = (probs > best_global_t).astype(int)
-f1_global = f1_score(true_labels, preds_global, average="micro")
-acc_global = accuracy_score(true_labels, preds_global)
-prec_global = precision_score(true_labels, preds_global, average="micro")
-rec_global = recall_score(true_labels, preds_global, average="micro")
+f1_global, acc_global, prec_global, rec_global = threshold_scores(best_global_t)
 
 # Method 3: Per-class thresholds
-preds_perclass = np.zeros_like(probs)
-for idx, label in enumerate(labels):
-    preds_perclass[:, idx] = (probs[:, idx] > best_thresholds[label]).astype(int)
-
-f1_perclass = f1_score(true_labels, preds_perclass, average="micro")
-acc_perclass = accuracy_score(true_labels, preds_perclass)
-prec_perclass = precision_score(true_labels, preds_perclass, average="micro")
-rec_perclass = recall_score(true_labels, preds_perclass, average="micro")
+f1_perclass, acc_perclass, prec_perclass, rec_perclass = threshold_scores(
+    np.array([best_thresholds[label] for label in labels])
+)
 
 # Print results
 print("\n📊 COMPARISON OF METHODS:")
@@ -0,0 +1,40 @@
+# prepare_data.py
+# One-time data preparation: GoEmotions texts, bit-packed labels and token ids
+# → memory-mapped files every training / threshold / evaluation script loads
+# (moodify_core.goemotions.load_split) instead of re-tokenizing at startup.
+#
+#   python prepare_data.py                          # default tokenizers below
+#   python prepare_data.py ./modelsequence:64       # model_or_tokenizer[:max_length] ...
+import sys
+
+from moodify_core.goemotions import DATA_DIR, load_split
+from moodify_core.tokenization import load_tokenizer
+
+SPLITS = ["train", "validation", "test"]
+
+# what the scripts in this repo tokenize with (tokenizers with identical ids share one copy)
+DEFAULT_TARGETS = [
+    "bert-base-uncased:128",        # bert-base_training.py
+    "distilbert-base-uncased:128",  # test.py
+    "./model:128",                  # threshold / evaluation scripts (DistilBERT)
+    "./modelsequence:128",          # evaluation, quantization (BERT-base)
+    "./modelsequence:64",           # threshold_optimize_per_class.py
+]
+
+
+def main():
+    for target in sys.argv[1:] or DEFAULT_TARGETS:
+        name, _, max_length = target.partition(":")
+        max_length = int(max_length or 128)
+
+        print(f"\n🔹 {name} (max_length={max_length})")
+        tokenizer = load_tokenizer(name)
+        for split in SPLITS:
+            data = load_split(split, tokenizer, max_length)
+            print(f"   {split:10s} {len(data):6d} rows, {int(data.lengths.sum()):8d} tokens → {data.tokens_path.name}")
+
+    print(f"\n✅ Prepared data in {DATA_DIR}")
+
+
+if __name__ == "__main__":
+    main()
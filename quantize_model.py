@@ -0,0 +1,64 @@
+# quantize_model.py
+# One-time offline int8 export for the service (MODEL_PRECISION=int8).
+import json
+import os
+import sys
+from pathlib import Path
+
+import torch
+import transformers
+from transformers import BertForSequenceClassification
+
+from moodify_core.evaluation import evaluate_pipeline
+from moodify_core.goemotions import load_split
+from moodify_core.postprocess import EmotionPostProcessor
+from moodify_core.quantization import quantize_dynamic_int8, save_int8, source_hashes
+from moodify_core.tokenization import load_tokenizer
+
+# same settings (and defaults) as model_service/runtime.py → the export is
+# checked against the weights and thresholds the service actually loads
+ROOT = Path(__file__).resolve().parent
+MODEL_PATH = os.getenv("MODEL_PATH", str(ROOT / "modelsequence"))
+THRESHOLD_PATH = os.getenv("THRESHOLDS_PATH", str(ROOT / "model_service" / "thresholds.json"))
+
+# refuse the export if micro-F1 drops by more than this (absolute);
+# same setting the service checks at load time
+MAX_F1_DROP = float(os.getenv("INT8_MAX_F1_DROP", "0.01"))
+
+print("📌 Loading model, tokenizer, thresholds...")
+tokenizer = load_tokenizer(MODEL_PATH)
+model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
+model.eval()
+
+with open(THRESHOLD_PATH) as f:
+    THRESHOLDS = json.load(f)
+
+postprocessor = EmotionPostProcessor(THRESHOLDS)
+
+test = load_split("test", tokenizer, max_length=128)   # prepared token ids, memory-mapped
+
+print("📌 Quantizing Linear layers to int8...")
+qmodel = quantize_dynamic_int8(model)
+
+print(f"📌 Accuracy guard on {len(test)} test samples...")
+fp32_metrics = evaluate_pipeline(model, tokenizer, postprocessor, "test")
+int8_metrics = evaluate_pipeline(qmodel, tokenizer, postprocessor, "test")
+
+drop = fp32_metrics["f1_micro"] - int8_metrics["f1_micro"]
+print(f"F1 Micro fp32: {fp32_metrics['f1_micro']:.4f}")
+print(f"F1 Micro int8: {int8_metrics['f1_micro']:.4f}   (drop {drop:+.4f})")
+
+if drop > MAX_F1_DROP:
+    print(f"❌ Drop exceeds MAX_F1_DROP={MAX_F1_DROP}, int8 export NOT written.")
+    sys.exit(1)
+
+save_int8(qmodel, MODEL_PATH, {
+    "torch_version": torch.__version__,
+    "transformers_version": transformers.__version__,
+    "thresholds": THRESHOLD_PATH,
+    **source_hashes(MODEL_PATH, THRESHOLDS),
+    "f1_micro_fp32": fp32_metrics["f1_micro"],
+    "f1_micro_int8": int8_metrics["f1_micro"],
+})
+
+print(f"✅ Saved int8 model to {MODEL_PATH}")
@@ -1,5 +1,4 @@
-from datasets import load_dataset
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification, TrainingArguments, Trainer
+from transformers import DistilBertForSequenceClassification, TrainingArguments, Trainer, DataCollatorWithPadding
 import numpy as np
 import torch
 
@@ -14,12 +13,10 @@ torch.serialization.add_safe_globals([torch.Generator])
 torch.serialization.add_safe_globals([__import__('numpy')._core.multiarray._reconstruct])
 from sklearn.metrics import f1_score
 
-# 1️⃣ Dataset
-dataset = load_dataset("go_emotions")
-train = dataset["train"]
-test = dataset["test"]
+from moodify_core.goemotions import load_split
+from moodify_core.tokenization import load_tokenizer
 
-# 2️⃣ Tokenizer & Model (resume varsa oradan yükle)
+# 1️⃣ Tokenizer & Model (resume varsa oradan yükle)
 num_labels = 28
 checkpoint_path = "./results/checkpoint-10853"  # 🔁 son kaydedilen checkpoint
 try:
@@ -37,32 +34,14 @@ except:
     )
     print("⚙️ Starting fresh training...")
 
-tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+tokenizer = load_tokenizer("distilbert-base-uncased")
 
-# 3️⃣ Tokenization
-def tokenize(batch):
-    encodings = tokenizer(
-        batch["text"],
-        truncation=True,
-        padding="max_length",
-        max_length=128
-    )
-    labels = []
-    for labs in batch["labels"]:
-        row = [0.0] * num_labels
-        for i in labs:
-            row[i] = 1.0
-        labels.append(row)
-    encodings["labels"] = labels
-    return encodings
-
-train = train.map(tokenize, batched=True)
-test = test.map(tokenize, batched=True)
-
-train.set_format(type="torch", columns=["input_ids", "attention_mask", "labels"])
-test.set_format(type="torch", columns=["input_ids", "attention_mask", "labels"])
+# 2️⃣ Dataset: prepared token ids, memory-mapped (prepare_data.py)
+#    no padding here → padded per batch by the collator
+train = load_split("train", tokenizer, max_length=128).torch_dataset()
+test = load_split("test", tokenizer, max_length=128).torch_dataset()
 
-# 4️⃣ Metrics
+# 3️⃣ Metrics
 def compute_metrics(eval_pred):
     logits, labels = eval_pred
     if isinstance(logits, tuple):
@@ -73,7 +52,7 @@ def compute_metrics(eval_pred):
     acc = (preds == labels).float().mean().item()
     return {"accuracy": acc, "f1_micro": f1}
 
-# 5️⃣ Trainer Override
+# 4️⃣ Trainer Override
 class FloatTrainer(Trainer):
     def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
         if "labels" in inputs:
@@ -82,7 +61,7 @@ class FloatTrainer(Trainer):
         loss = outputs.get("loss") if isinstance(outputs, dict) else outputs[0]
         return (loss, outputs) if return_outputs else loss
 
-# 6️⃣ Training Args (yer tasarrufu + devam)
+# 5️⃣ Training Args (yer tasarrufu + devam)
 training_args = TrainingArguments(
     output_dir="./results",
     eval_strategy="epoch",
@@ -93,22 +72,24 @@ training_args = TrainingArguments(
     logging_steps=100,
     save_strategy="epoch",      # 🔁 sadece epoch sonunda kaydet
     save_total_limit=1,         # 💾 sadece 1 checkpoint tut (disk dolmaz)
+    group_by_length=True,       # benzer uzunluklar aynı batch'te → az padding
 )
 
-# 7️⃣ Trainer
+# 6️⃣ Trainer
 trainer = FloatTrainer(
     model=model,
     args=training_args,
     train_dataset=train,
     eval_dataset=test,
     tokenizer=tokenizer,
+    data_collator=DataCollatorWithPadding(tokenizer),
     compute_metrics=compute_metrics,
 )
 
-# 8️⃣ Train (resume)
+# 7️⃣ Train (resume)
 trainer.train(resume_from_checkpoint=checkpoint_path)
 
-# 9️⃣ Save final model
+# 8️⃣ Save final model
 trainer.save_model("./model")
 tokenizer.save_pretrained("./model")
 print("✅ Training completed and model saved.")
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from moodify_core.thresholds import best_global_threshold, best_thresholds_per_class
+
+
+def f1_at(probs, labels, threshold):
+    preds = probs > threshold
+    tp = np.sum(preds & labels)
+    denom = preds.sum() + labels.sum()
+    return 2 * tp / denom if denom else 0.0
+
+
+def brute_force(probs, labels, bounds=None):
+    """Best F1 over every threshold that splits the column differently."""
+    values = np.unique(probs)
+    candidates = np.concatenate([[np.nextafter(values[0], -np.inf)], values])
+    if bounds is not None:
+        lo, hi = bounds
+        candidates = np.clip(candidates, lo, hi)
+    return max(f1_at(probs, labels, t) for t in candidates)
+
+
+def random_columns(rng, n, num_classes):
+    probs = rng.random((n, num_classes))
+    # ties, exact zeros and a coarse grid → hit the sorted-array edge cases
+    probs[:, ::3] = np.round(probs[:, ::3], 1)
+    probs[rng.random((n, num_classes)) < 0.05] = 0.0
+    labels = rng.random((n, num_classes)) < rng.random(num_classes)
+    return probs, labels
+
+
+@pytest.mark.parametrize("bounds", [None, (0.05, 0.5)])
+def test_per_class_matches_brute_force(bounds):
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 30))
+        probs, labels = random_columns(rng, n, 20)
+        thresholds, f1 = best_thresholds_per_class(probs, labels, bounds=bounds, fallback=0.3)
+
+        for c in range(probs.shape[1]):
+            expected = brute_force(probs[:, c], labels[:, c], bounds)
+            assert f1[c] == pytest.approx(expected)
+            if f1[c] > 0:
+                # the returned threshold really achieves the returned F1
+                assert f1_at(probs[:, c], labels[:, c], thresholds[c]) == pytest.approx(f1[c])
+                if bounds is not None:
+                    assert bounds[0] <= thresholds[c] <= bounds[1]
+            else:
+                assert thresholds[c] == 0.3
+
+
+def test_predict_everything_cut_keeps_minimum_rows():
+    # best cut predicts every row, including the ones at the minimum score
+    probs = np.array([[0.06], [0.06], [0.3]])
+    labels = np.array([[1], [1], [1]])
+    thresholds, f1 = best_thresholds_per_class(probs, labels, bounds=(0.05, 0.5))
+    assert f1[0] == pytest.approx(1.0)
+    assert (probs[:, 0] > thresholds[0]).all()
+
+    probs = np.array([[0.0], [0.0], [0.7]])
+    thresholds, f1 = best_thresholds_per_class(probs, labels)
+    assert f1[0] == pytest.approx(1.0)
+    assert (probs[:, 0] > thresholds[0]).all()
+
+
+def test_global_threshold_matches_brute_force():
+    rng = np.random.default_rng(1)
+    probs, labels = random_columns(rng, 40, 6)
+    t, f1 = best_global_threshold(probs, labels, bounds=(0.05, 0.5))
+    assert f1 == pytest.approx(brute_force(probs.ravel(), labels.ravel(), (0.05, 0.5)))
+    assert f1_at(probs.ravel(), labels.ravel(), t) == pytest.approx(f1)
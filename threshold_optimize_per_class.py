@@ -1,9 +1,13 @@
 # threshold_optimize_per_class.py
 import numpy as np
 import torch
-from datasets import load_dataset
-from transformers import BertTokenizer, BertForSequenceClassification
-from sklearn.metrics import f1_score
+from transformers import BertForSequenceClassification
+
+from moodify_core.data import predict_logits
+from moodify_core.goemotions import load_split
+from moodify_core.logits_cache import load_or_compute
+from moodify_core.thresholds import best_thresholds_per_class
+from moodify_core.tokenization import load_tokenizer
 
 labels = [
     "admiration", "amusement", "anger", "annoyance", "approval", "caring",
@@ -13,81 +17,43 @@ labels = [
     "remorse", "sadness", "surprise", "neutral"
 ]
 
-print("📌 Loading test dataset...")
-dataset = load_dataset("go_emotions")
-test = dataset["test"]
-
-print("📌 Loading tokenizer + model...")
-
 MODEL_PATH = "./modelsequence"   # <- BERT modelinin olduğu klasör
-tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
-model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
+MAX_LENGTH = 64
 
-model.eval()
-model.to("cpu")
-torch.set_num_threads(4)
 
-# test ifadelerini tokenize et
-def tokenize(batch):
-    return tokenizer(
-        batch["text"],
-        truncation=True,
-        padding="max_length",
-        max_length=64
-    )
+def run_model():
+    print("📌 Loading tokenizer + model...")
+    tokenizer = load_tokenizer(MODEL_PATH)
+    model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
 
-print("📌 Tokenizing...")
-test_enc = test.map(tokenize, batched=True, load_from_cache_file=False)
+    model.eval()
+    model.to("cpu")
+    torch.set_num_threads(4)
 
-# tensora çevir
-input_ids = torch.tensor(test_enc["input_ids"])
-attention_mask = torch.tensor(test_enc["attention_mask"])
+    print("📌 Loading test dataset...")
+    test = load_split("test", tokenizer, max_length=MAX_LENGTH)   # prepared token ids, memory-mapped
 
-# gerçek etiketler
-num_labels = len(labels)
-true_labels = np.zeros((len(test), num_labels))
+    # Model logits (length-bucketed, padded per batch, original order restored)
+    print("📌 Running model on test set...")
+    logits = predict_logits(
+        model, tokenizer, test.texts, max_length=MAX_LENGTH, batch_size=64, encodings=test.encodings()
+    )
+    return logits.numpy(), test.labels
 
-for i, labs in enumerate(test["labels"]):
-    row = [0.0] * num_labels
-    for l in labs:
-        row[l] = 1.0
-    true_labels[i] = row
 
-# Model logits
-print("📌 Running model on test set...")
-with torch.no_grad():
-    logits = []
-    bs = 64
-    for i in range(0, len(test), bs):
-        out = model(
-            input_ids[i:i+bs],
-            attention_mask=attention_mask[i:i+bs]
-        )
-        logits.append(out.logits)
-    logits = torch.cat(logits).sigmoid().numpy()
+# logits + gerçek etiketler (diskte varsa model hiç çalışmaz)
+raw_logits, true_labels = load_or_compute(MODEL_PATH, "go_emotions/test", MAX_LENGTH, run_model)
+logits = 1 / (1 + np.exp(-raw_logits))  # sigmoid
 
 print("📌 Optimizing thresholds per class...")
 
-candidate_thresholds = np.arange(0.05, 0.51, 0.05)
+# exact F1-optimal cut per class in [0.05, 0.50], all 28 columns at once
+class_t, class_f1 = best_thresholds_per_class(logits, true_labels, bounds=(0.05, 0.50), fallback=0.3)
 best_thresholds = {}
 
 for idx, label in enumerate(labels):
-    best_f1 = 0
-    best_t = 0.3  # fallback
-
-    y_true = true_labels[:, idx]
-    y_prob = logits[:, idx]
-
-    for t in candidate_thresholds:
-        y_pred = (y_prob > t).astype(int)
-        f1 = f1_score(y_true, y_pred, zero_division=0)
-
-        if f1 > best_f1:
-            best_f1 = f1
-            best_t = t
-
-    best_thresholds[label] = best_t
-    print(f"{label:15s}  best_t = {best_t:.2f}   f1 = {best_f1:.4f}")
+    best_thresholds[label] = float(class_t[idx])
+    print(f"{label:15s}  best_t = {class_t[idx]:.4f}   f1 = {class_f1[idx]:.4f}")
 
 print("\n🎉 DONE! Save this dictionary and use it in inference:\n")
 print(best_thresholds)